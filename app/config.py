@@ -0,0 +1,89 @@
+# app/config.py
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Maximum number of sales notes accepted by a single bulk create request
+BULK_MAX_NOTES = int(os.getenv("BULK_MAX_NOTES", "1000"))
+
+# Render PDFs in a background worker pool instead of on the request thread
+PDF_JOBS_ENABLED = os.getenv("PDF_JOBS_ENABLED", "false").lower() == "true"
+# Number of worker processes rendering PDF jobs
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+# Seconds a running PDF job may go without finishing before it is considered abandoned and may be claimed again
+PDF_JOB_LEASE_SECONDS = int(os.getenv("PDF_JOB_LEASE_SECONDS", "300"))
+
+# Where rendered PDFs are stored: "local" (sharded under PDF_STORAGE_PATH) or "s3"
+PDF_STORAGE_BACKEND = os.getenv("PDF_STORAGE_BACKEND", "local").lower()
+# Directory where rendered PDFs are stored by the local backend, and where batch output is written
+PDF_STORAGE_PATH = os.getenv("PDF_STORAGE_PATH", "/tmp/sales_notes_pdfs")
+# Bucket, key prefix and optional endpoint (e.g. a MinIO server) for the s3 backend
+PDF_S3_BUCKET = os.getenv("PDF_S3_BUCKET")
+PDF_S3_PREFIX = os.getenv("PDF_S3_PREFIX", "sales-notes")
+PDF_S3_ENDPOINT_URL = os.getenv("PDF_S3_ENDPOINT_URL") or None
+# Redirect PDF downloads to presigned URLs instead of proxying the bytes (s3 backend only)
+PDF_PRESIGNED_URLS = os.getenv("PDF_PRESIGNED_URLS", "false").lower() == "true"
+# Seconds a presigned download URL stays valid
+PDF_PRESIGNED_URL_TTL = int(os.getenv("PDF_PRESIGNED_URL_TTL", "300"))
+# Size budget for stored PDFs in bytes; least recently used renders are evicted beyond it (0 disables eviction)
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Deployment environment; metrics are only published to CloudWatch in production
+ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+# Seconds between metric flushes
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "60"))
+# Metric datums per PutMetricData call
+METRICS_BATCH_SIZE = int(os.getenv("METRICS_BATCH_SIZE", "1000"))
+# Estimated request size per PutMetricData call, kept below CloudWatch's 1 MB limit
+METRICS_BATCH_MAX_BYTES = int(os.getenv("METRICS_BATCH_MAX_BYTES", "900000"))
+# Distinct metric series kept between flushes; observations for further series are dropped
+METRICS_MAX_SERIES = int(os.getenv("METRICS_MAX_SERIES", "2000"))
+# Unexported batches retained while the exporter is failing or falling behind
+METRICS_MAX_PENDING_BATCHES = int(os.getenv("METRICS_MAX_PENDING_BATCHES", "20"))
+
+# Customers/products kept by each in-process lookup cache, and how long an entry stays fresh (seconds)
+LOOKUP_CACHE_MAX_SIZE = int(os.getenv("LOOKUP_CACHE_MAX_SIZE", "10000"))
+LOOKUP_CACHE_TTL = float(os.getenv("LOOKUP_CACHE_TTL", "300"))
+
+# Maximum number of sales notes rendered by a single PDF batch job
+PDF_BATCH_MAX_NOTES = int(os.getenv("PDF_BATCH_MAX_NOTES", "5000"))
+# Maximum for PDF batches rendered while the request waits, i.e. when PDF_JOBS_ENABLED is off
+PDF_BATCH_SYNC_MAX_NOTES = int(os.getenv("PDF_BATCH_SYNC_MAX_NOTES", "50"))
+
+# Count SQL statements and database time per request, exported as Server-Timing headers and metrics
+REQUEST_INSTRUMENTATION = os.getenv("REQUEST_INSTRUMENTATION", "false").lower() == "true"
+# Slowest statements kept per request, logged for requests over PROFILE_THRESHOLD_MS
+SLOW_QUERY_LOG_COUNT = int(os.getenv("SLOW_QUERY_LOG_COUNT", "5"))
+# Share of instrumented requests run under a profiler (0 disables profiling)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+# Profiled requests slower than this (milliseconds) are written to PROFILE_DIR
+PROFILE_THRESHOLD_MS = float(os.getenv("PROFILE_THRESHOLD_MS", "500"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/sales_notes_profiles")
+# "cprofile" (.prof files for pstats/snakeviz) or "pyinstrument" (.html, requires the pyinstrument package)
+PROFILER = os.getenv("PROFILER", "cprofile").lower()
+
+# Seconds a create response is kept for replay to retries carrying the same Idempotency-Key
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", "86400"))
+# Seconds between sweeps of expired idempotency keys, and keys deleted per sweep statement
+IDEMPOTENCY_SWEEP_INTERVAL = float(os.getenv("IDEMPOTENCY_SWEEP_INTERVAL", "300"))
+IDEMPOTENCY_SWEEP_BATCH = int(os.getenv("IDEMPOTENCY_SWEEP_BATCH", "5000"))
+
+# Serve the sales-note read endpoints from column tuples encoded by orjson instead of through the response models
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() == "true"
+
+# Paid and canceled notes dated more than this many days ago are moved to the archive tables
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "730"))
+# Notes moved per archive transaction
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+
+# Changes returned per page of GET /api/sales-notes/changes, and per batch of its event stream
+CHANGE_FEED_BATCH_SIZE = int(os.getenv("CHANGE_FEED_BATCH_SIZE", "100"))
+# Longest long-poll ("wait") accepted, and seconds between feed checks while waiting or streaming
+CHANGE_FEED_MAX_WAIT = float(os.getenv("CHANGE_FEED_MAX_WAIT", "30"))
+CHANGE_FEED_POLL_INTERVAL = float(os.getenv("CHANGE_FEED_POLL_INTERVAL", "0.5"))
+# Seconds between keep-alive comments on an idle event stream
+CHANGE_FEED_HEARTBEAT = float(os.getenv("CHANGE_FEED_HEARTBEAT", "15"))
+# Changes older than this many days are removed by "manage.py prune-changes"
+CHANGE_FEED_RETENTION_DAYS = int(os.getenv("CHANGE_FEED_RETENTION_DAYS", "7"))
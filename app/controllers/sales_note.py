@@ -1,25 +1,234 @@
 # app/controllers/sales_note.py
-from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy.orm import Session, selectinload, noload
+from sqlalchemy import text, insert, update, select, tuple_, or_
 from fastapi import HTTPException
-from datetime import datetime
+from datetime import datetime, date
+from typing import List
 import uuid
 
 from app.models.sales_note import SalesNote, SalesNoteItem
-from app.schemas.sales_note import SalesNoteCreate, SalesNoteUpdate
+from app.models.sales_note_archive import SalesNoteArchive, SalesNoteItemArchive
+from app.models.pdf_job import PdfJob
+from app.schemas.sales_note import SalesNoteCreate, SalesNoteUpdate, SalesNoteResponse, PdfBatchRequest
 from app.utils.pdf_generator import PDFGenerator
+from app.utils.pdf_jobs import PDFJobQueue
+from app.utils.pdf_cache import PDFCache
+from app.utils.pdf_batch import PDFBatchRenderer
+from app.utils.sales_stats import SalesNoteRollup
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.lookup_cache import customer_cache, product_cache
+from app.utils.idempotency import IdempotencyKeys
+from app.utils.fast_json import SalesNoteSerializer
+from app.utils.change_feed import SalesNoteChangeFeed
+
+VALID_STATUSES = ["draft", "issued", "paid", "canceled"]
+
+# Allowed status transitions, enforced in the UPDATE statements below: paid and canceled are final
+STATUS_TRANSITIONS = {
+    "draft": ("draft", "issued", "paid", "canceled"),
+    "issued": ("draft", "issued", "paid", "canceled"),
+    "paid": ("paid",),
+    "canceled": ("canceled",),
+}
+
+# Statuses in which a note's amounts may still be edited
+EDITABLE_STATUSES = ("draft", "issued")
+
+# Sort keys accepted by search_sales_notes ("-" prefix for descending) and how their cursors decode
+SEARCH_SORTS = {
+    "created_at": (SalesNote.created_at, datetime.fromisoformat),
+    "note_date": (SalesNote.note_date, datetime.fromisoformat),
+    "total_amount": (SalesNote.total_amount, float),
+}
 
 class SalesNoteController:
     @staticmethod
-    def get_sales_notes(db: Session, skip: int = 0, limit: int = 100, customer_id: int = None):
-        query = db.query(SalesNote)
+    def get_sales_notes(db: Session, skip: int = 0, limit: int = 100, customer_id: int = None, cursor: str = None,
+                        include_items: bool = True, date_from: datetime = None, date_to: datetime = None):
+        """
+        Returns a page of sales notes, newest first, and the cursor of the next page (None on the last page).
+        With a cursor the page starts right after the encoded (created_at, id) position, so the
+        cost does not grow with depth; otherwise ``skip`` is applied as an offset.
+        Items of the whole page are loaded with one additional query, or not at all.
+        """
+        query = db.query(SalesNote).options(
+            selectinload(SalesNote.items) if include_items else noload(SalesNote.items)
+        )
+        notes = SalesNoteController._paginate(query, skip, limit, customer_id, cursor, date_from, date_to).all()
+        return SalesNoteController._next_page(notes, limit, lambda note: (note.created_at, note.id))
+
+    @staticmethod
+    def _paginate(query, skip: int, limit: int, customer_id: int = None, cursor: str = None,
+                  date_from: datetime = None, date_to: datetime = None):
+        """
+        Applies the listing's filters, order and limit to an ORM query or select().
+        One extra row is fetched so _next_page can tell whether another page follows.
+        """
         if customer_id:
             query = query.filter(SalesNote.customer_id == customer_id)
-        return query.order_by(SalesNote.created_at.desc()).offset(skip).limit(limit).all()
+        if date_from is not None:
+            query = query.filter(SalesNote.note_date >= date_from)
+        if date_to is not None:
+            query = query.filter(SalesNote.note_date < date_to)
+
+        if cursor:
+            try:
+                created_at, sales_note_id = decode_cursor(cursor)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            query = query.filter(tuple_(SalesNote.created_at, SalesNote.id) < (created_at, sales_note_id))
+        elif skip:
+            query = query.offset(skip)
+
+        return query.order_by(SalesNote.created_at.desc(), SalesNote.id.desc()).limit(limit + 1)
+
+    @staticmethod
+    def _next_page(rows, limit: int, position):
+        """Trims the extra row fetched by _paginate and returns (rows, next cursor)."""
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(*position(rows[-1]))
+        return rows, next_cursor
+
+    @staticmethod
+    def search_sales_notes(db: Session, filters: dict, sort: str = "-created_at", limit: int = 100,
+                           cursor: str = None, include_items: bool = True):
+        """
+        Returns a page of the notes matching every given filter, in ``sort`` order, and the
+        cursor of the next page. ``filters`` takes customer_id, statuses, date_from/date_to
+        (note_date), min_total/max_total and note_number_prefix; each has an index to use.
+        """
+        query = db.query(SalesNote).options(
+            selectinload(SalesNote.items) if include_items else noload(SalesNote.items)
+        )
+        notes = SalesNoteController._search(query, filters, sort, limit, cursor).all()
+        return SalesNoteController._next_page(notes, limit, SalesNoteController._sort_position(sort))
+
+    @staticmethod
+    def search_sales_note_documents(db: Session, filters: dict, sort: str = "-created_at", limit: int = 100,
+                                    cursor: str = None, include_items: bool = True):
+        """Same page as search_sales_notes, as plain response documents for SalesNoteSerializer."""
+        query = SalesNoteController._search(select(*SalesNoteSerializer.note_columns()), filters, sort, limit, cursor)
+        notes, next_cursor = SalesNoteController._next_page(
+            db.execute(query).all(), limit, SalesNoteController._sort_position(sort)
+        )
+        items = []
+        if include_items and notes:
+            items = db.execute(SalesNoteController._document_items([note.id for note in notes])).all()
+        return SalesNoteSerializer.documents(notes, items), next_cursor
+
+    @staticmethod
+    def _search(query, filters: dict, sort: str, limit: int, cursor: str = None):
+        """Applies the search filters, keyset position, (sort key, id) order and limit to an ORM query or select()."""
+        invalid = [status for status in filters.get("statuses") or () if status not in VALID_STATUSES]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(VALID_STATUSES)}")
+        if filters.get("customer_id") is not None:
+            query = query.filter(SalesNote.customer_id == filters["customer_id"])
+        if filters.get("statuses"):
+            query = query.filter(SalesNote.status.in_(filters["statuses"]))
+        if filters.get("date_from") is not None:
+            query = query.filter(SalesNote.note_date >= filters["date_from"])
+        if filters.get("date_to") is not None:
+            query = query.filter(SalesNote.note_date < filters["date_to"])
+        if filters.get("min_total") is not None:
+            query = query.filter(SalesNote.total_amount >= filters["min_total"])
+        if filters.get("max_total") is not None:
+            query = query.filter(SalesNote.total_amount <= filters["max_total"])
+        if filters.get("note_number_prefix"):
+            query = query.filter(SalesNote.note_number.startswith(filters["note_number_prefix"], autoescape=True))
+
+        column, value_type = SEARCH_SORTS[sort.lstrip("-")]
+        descending = sort.startswith("-")
+        if cursor:
+            try:
+                value, sales_note_id = decode_cursor(cursor, value_type)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            position = tuple_(column, SalesNote.id)
+            query = query.filter(position < (value, sales_note_id) if descending else position > (value, sales_note_id))
+
+        if descending:
+            return query.order_by(column.desc(), SalesNote.id.desc()).limit(limit + 1)
+        return query.order_by(column, SalesNote.id).limit(limit + 1)
+
+    @staticmethod
+    def _sort_position(sort: str):
+        name = sort.lstrip("-")
+        return lambda note: (getattr(note, name), note.id)
+
+    @staticmethod
+    def get_sales_note_documents(db: Session, skip: int = 0, limit: int = 100, customer_id: int = None,
+                                 cursor: str = None, include_items: bool = True, date_from: datetime = None,
+                                 date_to: datetime = None):
+        """
+        Same page as get_sales_notes, as plain response documents for SalesNoteSerializer:
+        notes and items are read as column tuples without building ORM objects.
+        """
+        query = SalesNoteController._paginate(
+            select(*SalesNoteSerializer.note_columns()), skip, limit, customer_id, cursor, date_from, date_to
+        )
+        notes, next_cursor = SalesNoteController._next_page(
+            db.execute(query).all(), limit, lambda row: (row.created_at, row.id)
+        )
+        items = []
+        if include_items and notes:
+            items = db.execute(SalesNoteController._document_items([note.id for note in notes])).all()
+        return SalesNoteSerializer.documents(notes, items), next_cursor
+
+    @staticmethod
+    def get_sales_note_document(db: Session, sales_note_id: int, include_archived: bool = False):
+        """Single-note counterpart of get_sales_note_documents."""
+        note = db.execute(select(*SalesNoteSerializer.note_columns()).where(SalesNote.id == sales_note_id)).first()
+        if note is not None:
+            items = db.execute(SalesNoteController._document_items([sales_note_id])).all()
+            return SalesNoteSerializer.documents([note], items)[0]
+
+        if include_archived:
+            note = db.execute(SalesNoteController._archived_document(sales_note_id)).first()
+            if note is not None:
+                items = db.execute(SalesNoteController._archived_document_items(note)).all()
+                return SalesNoteSerializer.documents([note], items)[0]
+        raise HTTPException(status_code=404, detail="Sales note not found")
+
+    @staticmethod
+    def _document_items(sales_note_ids):
+        return (
+            select(*SalesNoteSerializer.item_columns())
+            .where(SalesNoteItem.sales_note_id.in_(sales_note_ids))
+            .order_by(SalesNoteItem.id)
+        )
+
+    @staticmethod
+    def _archived_document(sales_note_id: int):
+        return select(
+            *SalesNoteSerializer.note_columns(SalesNoteArchive.__table__)
+        ).where(SalesNoteArchive.id == sales_note_id)
+
+    @staticmethod
+    def _archived_document_items(note):
+        # The note's date restricts the item lookup to a single partition
+        return (
+            select(*SalesNoteSerializer.item_columns(SalesNoteItemArchive.__table__))
+            .where(SalesNoteItemArchive.sales_note_id == note.id, SalesNoteItemArchive.note_date == note.note_date)
+            .order_by(SalesNoteItemArchive.id)
+        )
 
     @staticmethod
-    def get_sales_note(db: Session, sales_note_id: int):
+    def get_sales_note(db: Session, sales_note_id: int, include_archived: bool = False):
+        """
+        Returns the note, falling back to the archive when include_archived is set. Archived
+        notes are read-only, so only read endpoints ask for them.
+        """
         sales_note = db.query(SalesNote).filter(SalesNote.id == sales_note_id).first()
+        if sales_note is None and include_archived:
+            sales_note = (
+                db.query(SalesNoteArchive)
+                .options(selectinload(SalesNoteArchive.items))
+                .filter(SalesNoteArchive.id == sales_note_id)
+                .first()
+            )
         if sales_note is None:
             raise HTTPException(status_code=404, detail="Sales note not found")
         return sales_note
@@ -28,24 +237,82 @@ class SalesNoteController:
     def get_sales_note_by_number(db: Session, note_number: str):
         return db.query(SalesNote).filter(SalesNote.note_number == note_number).first()
 
+    @staticmethod
+    def _get_sales_note_for_update(db: Session, sales_note_id: int):
+        """Loads and row-locks a note, so its old values stay valid until the change commits."""
+        sales_note = (
+            db.query(SalesNote)
+            .filter(SalesNote.id == sales_note_id)
+            .with_for_update()
+            .populate_existing()
+            .first()
+        )
+        if sales_note is None:
+            raise HTTPException(status_code=404, detail="Sales note not found")
+        return sales_note
+
+    @staticmethod
+    def _generate_note_number():
+        current_year = datetime.now().year
+        return f"SN-{current_year}-{str(uuid.uuid4())[:8].upper()}"
+
     @staticmethod
     def create_sales_note(db: Session, sales_note: SalesNoteCreate):
-        # Verify customer exists - FIXED: Using parameterized query
-        customer = db.execute(
-            text("SELECT id FROM customers WHERE id = :customer_id"),
-            {"customer_id": sales_note.customer_id}
-        ).fetchone()
+        db_sales_note = SalesNoteController._insert_sales_note(db, sales_note)
+        db.commit()
+        db.refresh(db_sales_note)
+        return db_sales_note
+
+    @staticmethod
+    def create_sales_note_idempotent(db: Session, sales_note: SalesNoteCreate, idempotency_key: str):
+        """
+        Creates a sales note once per Idempotency-Key and returns (status_code, body, replayed).
+        Retries get the stored response of the first attempt without repeating the create.
+        """
+        request_hash = IdempotencyKeys.fingerprint(sales_note.model_dump())
+        stored = db.execute(IdempotencyKeys.lookup(idempotency_key)).first()
+        if stored is None:
+            # Blocks while a concurrent request holding the key is still running
+            if db.execute(IdempotencyKeys.claim(idempotency_key, request_hash)).first() is not None:
+                db_sales_note = SalesNoteController._insert_sales_note(db, sales_note)
+                db.flush()
+                db.refresh(db_sales_note)
+                body = SalesNoteResponse.model_validate(db_sales_note, from_attributes=True).model_dump(mode="json")
+                db.execute(IdempotencyKeys.store(idempotency_key, 201, body))
+                db.commit()
+                return 201, body, False
+            stored = db.execute(IdempotencyKeys.lookup(idempotency_key)).first()
+        return SalesNoteController._replay(stored, request_hash)
+
+    @staticmethod
+    def _replay(stored, request_hash: str):
+        if stored is None or stored.status_code is None:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+        if stored.request_hash != request_hash:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request body")
+        # JSONB does not keep key order; re-serialise so a replay matches the first response byte for byte
+        body = SalesNoteResponse.model_validate(stored.response).model_dump(mode="json")
+        return stored.status_code, body, True
+
+    @staticmethod
+    def _insert_sales_note(db: Session, sales_note: SalesNoteCreate):
+        """Validates and inserts a note with its items and rollup delta, leaving the transaction open."""
+        # Verify customer exists
+        customer = customer_cache.get(db, sales_note.customer_id)
 
         if not customer:
             raise HTTPException(status_code=404, detail="Customer not found")
 
-        # Generate a unique note number
-        current_year = datetime.now().year
-        note_number = f"SN-{current_year}-{str(uuid.uuid4())[:8].upper()}"
+        # Verify all products exist with one lookup instead of one per item
+        product_ids = [item.product_id for item in sales_note.items]
+        existing_products = product_cache.get_many(db, product_ids)
+        for product_id in product_ids:
+            if product_id not in existing_products:
+                raise HTTPException(status_code=404, detail=f"Product with ID {product_id} not found")
 
         # Create sales note
         db_sales_note = SalesNote(
-            note_number=note_number,
+            note_number=SalesNoteController._generate_note_number(),
             customer_id=sales_note.customer_id,
             total_amount=sales_note.total_amount,
             tax_amount=sales_note.tax_amount,
@@ -56,51 +323,202 @@ class SalesNoteController:
         db.flush()
 
         # Create sales note items
-        for item in sales_note.items:
-            # Verify product exists - FIXED: Using parameterized query
-            product = db.execute(
-                text("SELECT id, price FROM products WHERE id = :product_id"),
-                {"product_id": item.product_id}
-            ).fetchone()
-
-            if not product:
-                db.rollback()
-                raise HTTPException(status_code=404, detail=f"Product with ID {item.product_id} not found")
-
-            # Create item
-            db_item = SalesNoteItem(
+        db.add_all([
+            SalesNoteItem(
                 sales_note_id=db_sales_note.id,
                 product_id=item.product_id,
                 quantity=item.quantity,
                 unit_price=item.unit_price,
                 subtotal=item.subtotal
             )
-            db.add(db_item)
+            for item in sales_note.items
+        ])
 
-        db.commit()
-        db.refresh(db_sales_note)
+        SalesNoteRollup.apply(db, [SalesNoteRollup.delta(db_sales_note)])
+        SalesNoteChangeFeed.record(db, "created", [db_sales_note.id])
         return db_sales_note
 
     @staticmethod
-    def update_sales_note(db: Session, sales_note_id: int, sales_note: SalesNoteUpdate):
-        db_sales_note = SalesNoteController.get_sales_note(db, sales_note_id)
+    def create_sales_notes_bulk(db: Session, sales_notes: List[SalesNoteCreate]):
+        """
+        Creates many sales notes in a single transaction.
+        Customers and products are validated through the lookup caches, which fetch all
+        misses with one set-based query each. Notes are written with a multi-row INSERT
+        and items with a single executemany. Notes that reference unknown customers or
+        products are reported and skipped.
+        """
+        customer_ids = {note.customer_id for note in sales_notes}
+        product_ids = {item.product_id for note in sales_notes for item in note.items}
+        existing_customers = customer_cache.get_many(db, customer_ids)
+        existing_products = set(product_cache.get_many(db, product_ids))
+
+        results = [None] * len(sales_notes)
+        accepted = {}
+        note_rows = []
+        now = datetime.now()
+        for index, note in enumerate(sales_notes):
+            if note.customer_id not in existing_customers:
+                results[index] = {"index": index, "success": False, "error": "Customer not found"}
+                continue
+
+            missing = sorted({item.product_id for item in note.items} - existing_products)
+            if missing:
+                results[index] = {
+                    "index": index,
+                    "success": False,
+                    "error": f"Product with ID {', '.join(str(product_id) for product_id in missing)} not found"
+                }
+                continue
+
+            note_number = SalesNoteController._generate_note_number()
+            accepted[note_number] = index
+            note_rows.append({
+                "note_number": note_number,
+                "customer_id": note.customer_id,
+                "total_amount": note.total_amount,
+                "tax_amount": note.tax_amount,
+                "status": note.status,
+                "note_date": now
+            })
+
+        if note_rows:
+            notes_table = SalesNote.__table__
+            try:
+                inserted = db.execute(
+                    insert(notes_table).values(note_rows).returning(
+                        notes_table.c.id, notes_table.c.note_number, notes_table.c.note_date,
+                        notes_table.c.customer_id, notes_table.c.status,
+                        notes_table.c.total_amount, notes_table.c.tax_amount
+                    )
+                ).fetchall()
+
+                item_rows = []
+                for row in inserted:
+                    sales_note_id, note_number = row.id, row.note_number
+                    index = accepted[note_number]
+                    results[index] = {
+                        "index": index,
+                        "success": True,
+                        "sales_note_id": sales_note_id,
+                        "note_number": note_number
+                    }
+                    for item in sales_notes[index].items:
+                        item_rows.append({
+                            "sales_note_id": sales_note_id,
+                            "product_id": item.product_id,
+                            "quantity": item.quantity,
+                            "unit_price": item.unit_price,
+                            "subtotal": item.subtotal
+                        })
+
+                if item_rows:
+                    db.execute(insert(SalesNoteItem.__table__), item_rows)
+
+                SalesNoteRollup.apply(db, [SalesNoteRollup.delta(row) for row in inserted])
+                SalesNoteChangeFeed.record(db, "created", [row.id for row in inserted])
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
 
-        # Check if update is allowed based on status
-        if db_sales_note.status in ["paid", "canceled"]:
-            raise HTTPException(status_code=400, detail="Cannot update a paid or canceled sales note")
+        created = sum(1 for result in results if result["success"])
+        return {"created": created, "failed": len(results) - created, "results": results}
 
-        # Update sales note data
-        update_data = sales_note.dict(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(db_sales_note, key, value)
+    @staticmethod
+    def _guarded_update(sales_note_id: int, allowed_from, values: dict):
+        """
+        Builds one UPDATE that locks the note, applies ``values`` (which must not be empty)
+        only if its current status is in ``allowed_from`` and at least one of them differs,
+        and returns the new row together with the old amounts and status. Nothing is
+        returned when the note is missing, the guard fails or nothing would change (see
+        _unchanged_note). Every updatable field is printed, so a real change drops the
+        stored PDF.
+        """
+        notes = SalesNote.__table__
+        old = (
+            select(notes.c.id, notes.c.status, notes.c.total_amount, notes.c.tax_amount)
+            .where(notes.c.id == sales_note_id)
+            .with_for_update()
+            .subquery("old")
+        )
+        changes = or_(*(notes.c[name].is_distinct_from(value) for name, value in values.items()))
+        return (
+            update(notes)
+            .where(notes.c.id == old.c.id, old.c.status.in_(allowed_from), changes)
+            .values(**values, pdf_path=None)
+            .returning(
+                *notes.c,
+                old.c.status.label("old_status"),
+                old.c.total_amount.label("old_total_amount"),
+                old.c.tax_amount.label("old_tax_amount")
+            )
+        )
+
+    @staticmethod
+    def _rollup_deltas(row):
+        """Deltas moving a note updated by ``_guarded_update`` from its old bucket to its new one."""
+        removed = (
+            row.note_date.date(), row.customer_id, row.old_status, -1, -row.old_total_amount, -row.old_tax_amount
+        )
+        return [removed, SalesNoteRollup.delta(row)]
+
+    @staticmethod
+    def _note_from_row(row):
+        return {column.name: row._mapping[column.name] for column in SalesNote.__table__.columns}
+
+    @staticmethod
+    def _current_note(sales_note_id: int):
+        return select(SalesNote.__table__).where(SalesNote.id == sales_note_id)
 
+    @staticmethod
+    def _unchanged_note(row, allowed_from, detail: str):
+        """
+        Explains a guarded update that changed nothing, given the note's current row: 404 if
+        the note is gone, 400 with ``detail`` if its status forbids the change, and otherwise
+        the values already matched, so the note is returned untouched.
+        """
+        if row is None:
+            raise HTTPException(status_code=404, detail="Sales note not found")
+        if row.status not in allowed_from:
+            raise HTTPException(status_code=400, detail=detail.format(status=row.status))
+        return row
+
+    @staticmethod
+    def _note_items(sales_note_id: int):
+        return select(SalesNoteItem.__table__).where(SalesNoteItem.sales_note_id == sales_note_id).order_by(SalesNoteItem.id)
+
+    @staticmethod
+    def update_sales_note(db: Session, sales_note_id: int, sales_note: SalesNoteUpdate):
+        update_data = sales_note.model_dump(exclude_unset=True)
+        if "status" in update_data and update_data["status"] not in VALID_STATUSES:
+            raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(VALID_STATUSES)}")
+
+        # Update sales note data, only while it is still editable; an empty body changes nothing
+        row = db.execute(
+            SalesNoteController._guarded_update(sales_note_id, EDITABLE_STATUSES, update_data)
+        ).first() if update_data else None
+        if row is None:
+            row = SalesNoteController._unchanged_note(
+                db.execute(SalesNoteController._current_note(sales_note_id)).first(),
+                EDITABLE_STATUSES, "Cannot update a paid or canceled sales note"
+            )
+            items = db.execute(SalesNoteController._note_items(sales_note_id)).mappings().all()
+            db.rollback()
+            return {**SalesNoteController._note_from_row(row), "items": items}
+
+        SalesNoteRollup.apply(db, SalesNoteController._rollup_deltas(row))
+        SalesNoteChangeFeed.record(db, "updated", [sales_note_id])
+        items = db.execute(SalesNoteController._note_items(sales_note_id)).mappings().all()
         db.commit()
-        db.refresh(db_sales_note)
-        return db_sales_note
+
+        # Stored renders no longer match the note
+        PDFCache.invalidate(sales_note_id)
+
+        return {**SalesNoteController._note_from_row(row), "items": items}
 
     @staticmethod
     def delete_sales_note(db: Session, sales_note_id: int):
-        db_sales_note = SalesNoteController.get_sales_note(db, sales_note_id)
+        db_sales_note = SalesNoteController._get_sales_note_for_update(db, sales_note_id)
 
         # Check if delete is allowed based on status
         if db_sales_note.status in ["paid"]:
@@ -112,7 +530,9 @@ class SalesNoteController:
             {"sales_note_id": sales_note_id}
         )
 
-        # Delete sales note
+        # Delete sales note; the change records its last state
+        SalesNoteRollup.apply(db, [SalesNoteRollup.delta(db_sales_note, -1)])
+        SalesNoteChangeFeed.record(db, "deleted", [sales_note_id])
         db.delete(db_sales_note)
         db.commit()
         return {"message": "Sales note deleted successfully"}
@@ -141,23 +561,201 @@ class SalesNoteController:
         return {"pdf_path": pdf_path}
 
     @staticmethod
-    def change_status(db: Session, sales_note_id: int, status: str):
-        valid_statuses = ["draft", "issued", "paid", "canceled"]
-        if status not in valid_statuses:
-            raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(valid_statuses)}")
+    def get_cached_pdf(db: Session, sales_note_id: int):
+        """Returns the stored PDF for an unchanged note without queueing a render, or None."""
+        sales_note = SalesNoteController.get_sales_note(db, sales_note_id)
 
-        db_sales_note = SalesNoteController.get_sales_note(db, sales_note_id)
+        pdf_path = PDFGenerator.cached_pdf_path(db, sales_note_id)
+        if pdf_path is None:
+            return None
 
-        # Handle status transitions
-        if db_sales_note.status == "paid" and status != "paid":
-            raise HTTPException(status_code=400, detail="Cannot change status of a paid sales note")
+        if sales_note.pdf_path != pdf_path:
+            sales_note.pdf_path = pdf_path
+            db.commit()
+        return {"pdf_path": pdf_path}
 
-        if db_sales_note.status == "canceled" and status != "canceled":
-            raise HTTPException(status_code=400, detail="Cannot change status of a canceled sales note")
+    @staticmethod
+    def get_pdf_document(db: Session, sales_note_id: int):
+        """
+        Returns (data, fingerprint, stored path or None) for serving a note's PDF without
+        going through generate-pdf first.
+        """
+        SalesNoteController.get_sales_note(db, sales_note_id)
 
-        # Update status
-        db_sales_note.status = status
+        data = PDFGenerator.load_document_data(db, sales_note_id)
+        fingerprint = PDFGenerator.fingerprint(data)
+        return data, fingerprint, PDFCache.lookup(sales_note_id, fingerprint)
+
+    @staticmethod
+    def enqueue_pdf_job(db: Session, sales_note_id: int):
+        # Verify sales note exists
+        SalesNoteController.get_sales_note(db, sales_note_id)
+
+        return PDFJobQueue.enqueue(db, sales_note_id)
+
+    @staticmethod
+    def get_pdf_job(db: Session, job_id: str):
+        job = db.query(PdfJob).filter(PdfJob.id == job_id).first()
+        if job is None:
+            raise HTTPException(status_code=404, detail="PDF job not found")
+        return job
+
+    @staticmethod
+    def get_pending_pdf_job(db: Session, sales_note_id: int):
+        return PDFJobQueue.pending_job(db, sales_note_id)
+
+    @staticmethod
+    def _check_pdf_batch(request: PdfBatchRequest):
+        if not (request.sales_note_ids or request.customer_id or request.date_from or request.date_to):
+            raise HTTPException(status_code=400, detail="Select the notes by ids, customer or date range")
+
+    @staticmethod
+    def enqueue_pdf_batch(db: Session, request: PdfBatchRequest, max_notes: int):
+        """Validates a batch selection and queues it on the PDF worker pool."""
+        SalesNoteController._check_pdf_batch(request)
+        try:
+            count = PDFBatchRenderer.count_notes(
+                db, request.sales_note_ids, request.customer_id, request.date_from, request.date_to, max_notes
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if count == 0:
+            raise HTTPException(status_code=404, detail="No sales notes match the selection")
+        return PDFJobQueue.enqueue_batch(db, request)
+
+    @staticmethod
+    def render_pdf_batch(db: Session, request: PdfBatchRequest, max_notes: int):
+        """Renders a small batch while the request waits, on the PDF worker pool shared with queued jobs."""
+        SalesNoteController._check_pdf_batch(request)
+        try:
+            report = PDFBatchRenderer.render(
+                db,
+                sales_note_ids=request.sales_note_ids,
+                customer_id=request.customer_id,
+                date_from=request.date_from,
+                date_to=request.date_to,
+                merge=request.merge,
+                max_notes=max_notes,
+                executor=PDFJobQueue.executor()
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if report["notes"] == 0:
+            raise HTTPException(status_code=404, detail="No sales notes match the selection")
+        return report
+
+    @staticmethod
+    def get_stats(db: Session, group_by: str, date_from: date = None, date_to: date = None,
+                  customer_id: int = None, status: str = None):
+        if date_from and date_to and date_from >= date_to:
+            raise HTTPException(status_code=400, detail="date_from must be before date_to")
+
+        groups, totals = SalesNoteRollup.query(db, group_by, date_from, date_to, customer_id, status)
+        return {"group_by": group_by, "groups": groups, "totals": totals}
+
+    @staticmethod
+    def change_status(db: Session, sales_note_id: int, status: str):
+        if status not in VALID_STATUSES:
+            raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(VALID_STATUSES)}")
+
+        # Update status where the transition is allowed; stored renders print the old status
+        allowed_from = [current for current, targets in STATUS_TRANSITIONS.items() if status in targets]
+        row = db.execute(
+            SalesNoteController._guarded_update(sales_note_id, allowed_from, {"status": status})
+        ).first()
+        if row is None:
+            # Already in the requested status: nothing to record, invalidate or re-render
+            row = SalesNoteController._unchanged_note(
+                db.execute(SalesNoteController._current_note(sales_note_id)).first(),
+                allowed_from, "Cannot change status of a {status} sales note"
+            )
+            items = db.execute(SalesNoteController._note_items(sales_note_id)).mappings().all()
+            db.rollback()
+            return {**SalesNoteController._note_from_row(row), "items": items}
+
+        SalesNoteRollup.apply(db, SalesNoteController._rollup_deltas(row))
+        SalesNoteChangeFeed.record(db, "status_changed", [sales_note_id])
+        items = db.execute(SalesNoteController._note_items(sales_note_id)).mappings().all()
         db.commit()
-        db.refresh(db_sales_note)
+        PDFCache.invalidate(sales_note_id)
 
-        return db_sales_note
+        return {**SalesNoteController._note_from_row(row), "items": items}
+
+    @staticmethod
+    def change_status_bulk(db: Session, sales_note_ids: List[int], status: str):
+        """
+        Transitions many notes with one statement. Requested ids are locked in id order,
+        notes whose current status allows the transition are updated, and every id is
+        reported with its previous status, as unchanged when it already had the requested
+        status, or with the reason it was left alone.
+        """
+        if status not in VALID_STATUSES:
+            raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(VALID_STATUSES)}")
+
+        sales_note_ids = list(dict.fromkeys(sales_note_ids))
+        allowed_from = [current for current, targets in STATUS_TRANSITIONS.items() if status in targets]
+        rows = db.execute(
+            text("""
+                WITH requested AS (
+                    SELECT id, ordinality FROM unnest(CAST(:ids AS integer[])) WITH ORDINALITY AS r(id, ordinality)
+                ),
+                old AS (
+                    SELECT n.id, n.status, n.customer_id, n.note_date, n.total_amount, n.tax_amount
+                    FROM sales_notes n JOIN requested r ON r.id = n.id
+                    ORDER BY n.id
+                    FOR UPDATE OF n
+                ),
+                updated AS (
+                    UPDATE sales_notes s
+                    SET status = :status, pdf_path = NULL, updated_at = now()
+                    FROM old
+                    WHERE s.id = old.id AND old.status = ANY(:allowed_from) AND old.status <> :status
+                    RETURNING s.id
+                )
+                SELECT r.id, old.status AS old_status, old.customer_id, old.note_date,
+                       old.total_amount, old.tax_amount, u.id IS NOT NULL AS updated
+                FROM requested r
+                LEFT JOIN old ON old.id = r.id
+                LEFT JOIN updated u ON u.id = r.id
+                ORDER BY r.ordinality
+            """),
+            {"ids": sales_note_ids, "status": status, "allowed_from": allowed_from}
+        ).fetchall()
+
+        deltas = []
+        results = []
+        changed = []
+        for row in rows:
+            if row.updated:
+                deltas.append((row.note_date.date(), row.customer_id, row.old_status, -1, -row.total_amount, -row.tax_amount))
+                deltas.append((row.note_date.date(), row.customer_id, status, 1, row.total_amount, row.tax_amount))
+                results.append({"sales_note_id": row.id, "success": True, "old_status": row.old_status, "status": status})
+                changed.append(row.id)
+            elif row.old_status == status:
+                results.append({
+                    "sales_note_id": row.id, "success": True, "old_status": row.old_status, "status": status, "unchanged": True
+                })
+            elif row.old_status is None:
+                results.append({"sales_note_id": row.id, "success": False, "error": "Sales note not found"})
+            else:
+                results.append({
+                    "sales_note_id": row.id,
+                    "success": False,
+                    "old_status": row.old_status,
+                    "error": f"Cannot change status of a {row.old_status} sales note"
+                })
+
+        SalesNoteRollup.apply(db, deltas)
+        SalesNoteChangeFeed.record(db, "status_changed", changed)
+        db.commit()
+        for sales_note_id in changed:
+            PDFCache.invalidate(sales_note_id)
+
+        succeeded = sum(1 for result in results if result["success"])
+        return {
+            "updated": len(changed),
+            "unchanged": succeeded - len(changed),
+            "failed": len(results) - succeeded,
+            "results": results
+        }
@@ -0,0 +1,256 @@
+# app/controllers/sales_note_async.py
+import asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text, select, delete
+from sqlalchemy.orm import selectinload, noload
+from fastapi import HTTPException
+from datetime import datetime
+
+from app.models.sales_note import SalesNote, SalesNoteItem
+from app.models.sales_note_archive import SalesNoteArchive
+from app.schemas.sales_note import SalesNoteCreate, SalesNoteUpdate, SalesNoteResponse
+from app.controllers.sales_note import SalesNoteController, VALID_STATUSES, STATUS_TRANSITIONS, EDITABLE_STATUSES
+from app.utils.pdf_cache import PDFCache
+from app.utils.sales_stats import SalesNoteRollup
+from app.utils.idempotency import IdempotencyKeys
+from app.utils.fast_json import SalesNoteSerializer
+from app.utils.change_feed import RECORD_CHANGES
+
+class AsyncSalesNoteController:
+    """
+    Async counterparts of the SalesNoteController CRUD methods, used when DB_ASYNC_MODE is enabled.
+    Async sessions cannot lazy load, so every returned note has its items loaded eagerly.
+    """
+
+    @staticmethod
+    async def get_sales_notes(db: AsyncSession, skip: int = 0, limit: int = 100, customer_id: int = None,
+                              cursor: str = None, include_items: bool = True, date_from: datetime = None,
+                              date_to: datetime = None):
+        query = select(SalesNote).options(
+            selectinload(SalesNote.items) if include_items else noload(SalesNote.items)
+        )
+        result = await db.execute(
+            SalesNoteController._paginate(query, skip, limit, customer_id, cursor, date_from, date_to)
+        )
+        return SalesNoteController._next_page(list(result.scalars().all()), limit, lambda note: (note.created_at, note.id))
+
+    @staticmethod
+    async def get_sales_note_documents(db: AsyncSession, skip: int = 0, limit: int = 100, customer_id: int = None,
+                                       cursor: str = None, include_items: bool = True, date_from: datetime = None,
+                                       date_to: datetime = None):
+        """Async counterpart of SalesNoteController.get_sales_note_documents."""
+        query = SalesNoteController._paginate(
+            select(*SalesNoteSerializer.note_columns()), skip, limit, customer_id, cursor, date_from, date_to
+        )
+        result = await db.execute(query)
+        notes, next_cursor = SalesNoteController._next_page(result.all(), limit, lambda row: (row.created_at, row.id))
+        items = []
+        if include_items and notes:
+            result = await db.execute(SalesNoteController._document_items([note.id for note in notes]))
+            items = result.all()
+        return SalesNoteSerializer.documents(notes, items), next_cursor
+
+    @staticmethod
+    async def get_sales_note_document(db: AsyncSession, sales_note_id: int, include_archived: bool = False):
+        """Async counterpart of SalesNoteController.get_sales_note_document."""
+        result = await db.execute(select(*SalesNoteSerializer.note_columns()).where(SalesNote.id == sales_note_id))
+        note = result.first()
+        if note is not None:
+            result = await db.execute(SalesNoteController._document_items([sales_note_id]))
+            return SalesNoteSerializer.documents([note], result.all())[0]
+
+        if include_archived:
+            note = (await db.execute(SalesNoteController._archived_document(sales_note_id))).first()
+            if note is not None:
+                result = await db.execute(SalesNoteController._archived_document_items(note))
+                return SalesNoteSerializer.documents([note], result.all())[0]
+        raise HTTPException(status_code=404, detail="Sales note not found")
+
+    @staticmethod
+    async def get_sales_note(db: AsyncSession, sales_note_id: int, include_archived: bool = False):
+        result = await db.execute(
+            select(SalesNote)
+            .options(selectinload(SalesNote.items))
+            .where(SalesNote.id == sales_note_id)
+            .execution_options(populate_existing=True)
+        )
+        sales_note = result.scalars().first()
+        if sales_note is None and include_archived:
+            result = await db.execute(
+                select(SalesNoteArchive)
+                .options(selectinload(SalesNoteArchive.items))
+                .where(SalesNoteArchive.id == sales_note_id)
+            )
+            sales_note = result.scalars().first()
+        if sales_note is None:
+            raise HTTPException(status_code=404, detail="Sales note not found")
+        return sales_note
+
+    @staticmethod
+    async def _get_sales_note_for_update(db: AsyncSession, sales_note_id: int):
+        result = await db.execute(
+            select(SalesNote)
+            .where(SalesNote.id == sales_note_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        sales_note = result.scalars().first()
+        if sales_note is None:
+            raise HTTPException(status_code=404, detail="Sales note not found")
+        return sales_note
+
+    @staticmethod
+    async def _apply_rollup(db: AsyncSession, deltas):
+        statement, rows = SalesNoteRollup.upsert_statement(deltas)
+        if statement is not None:
+            await db.execute(statement, rows)
+
+    @staticmethod
+    async def _record_changes(db: AsyncSession, operation: str, sales_note_ids):
+        await db.execute(RECORD_CHANGES, {"operation": operation, "ids": list(sales_note_ids)})
+
+    @staticmethod
+    async def _existing_ids(db: AsyncSession, table: str, ids):
+        if not ids:
+            return set()
+        result = await db.execute(text(f"SELECT id FROM {table} WHERE id = ANY(:ids)"), {"ids": list(ids)})
+        return {row[0] for row in result.fetchall()}
+
+    @staticmethod
+    async def create_sales_note(db: AsyncSession, sales_note: SalesNoteCreate):
+        db_sales_note = await AsyncSalesNoteController._insert_sales_note(db, sales_note)
+        await db.commit()
+        return await AsyncSalesNoteController.get_sales_note(db, db_sales_note.id)
+
+    @staticmethod
+    async def create_sales_note_idempotent(db: AsyncSession, sales_note: SalesNoteCreate, idempotency_key: str):
+        """Async counterpart of SalesNoteController.create_sales_note_idempotent."""
+        request_hash = IdempotencyKeys.fingerprint(sales_note.model_dump())
+        stored = (await db.execute(IdempotencyKeys.lookup(idempotency_key))).first()
+        if stored is None:
+            # Blocks while a concurrent request holding the key is still running
+            if (await db.execute(IdempotencyKeys.claim(idempotency_key, request_hash))).first() is not None:
+                db_sales_note = await AsyncSalesNoteController._insert_sales_note(db, sales_note)
+                await db.flush()
+                db_sales_note = await AsyncSalesNoteController.get_sales_note(db, db_sales_note.id)
+                body = SalesNoteResponse.model_validate(db_sales_note, from_attributes=True).model_dump(mode="json")
+                await db.execute(IdempotencyKeys.store(idempotency_key, 201, body))
+                await db.commit()
+                return 201, body, False
+            stored = (await db.execute(IdempotencyKeys.lookup(idempotency_key))).first()
+        return SalesNoteController._replay(stored, request_hash)
+
+    @staticmethod
+    async def _insert_sales_note(db: AsyncSession, sales_note: SalesNoteCreate):
+        customers = await AsyncSalesNoteController._existing_ids(db, "customers", {sales_note.customer_id})
+        if not customers:
+            raise HTTPException(status_code=404, detail="Customer not found")
+
+        # Verify all products exist with one lookup instead of one per item
+        product_ids = [item.product_id for item in sales_note.items]
+        existing_products = await AsyncSalesNoteController._existing_ids(db, "products", set(product_ids))
+        for product_id in product_ids:
+            if product_id not in existing_products:
+                raise HTTPException(status_code=404, detail=f"Product with ID {product_id} not found")
+
+        db_sales_note = SalesNote(
+            note_number=SalesNoteController._generate_note_number(),
+            customer_id=sales_note.customer_id,
+            total_amount=sales_note.total_amount,
+            tax_amount=sales_note.tax_amount,
+            status=sales_note.status,
+            note_date=datetime.now()
+        )
+        db.add(db_sales_note)
+        await db.flush()
+
+        db.add_all([
+            SalesNoteItem(
+                sales_note_id=db_sales_note.id,
+                product_id=item.product_id,
+                quantity=item.quantity,
+                unit_price=item.unit_price,
+                subtotal=item.subtotal
+            )
+            for item in sales_note.items
+        ])
+
+        await AsyncSalesNoteController._apply_rollup(db, [SalesNoteRollup.delta(db_sales_note)])
+        await AsyncSalesNoteController._record_changes(db, "created", [db_sales_note.id])
+        return db_sales_note
+
+    @staticmethod
+    async def _apply_guarded_update(db: AsyncSession, sales_note_id: int, allowed_from, values: dict, operation: str,
+                                    detail: str):
+        """
+        Runs SalesNoteController's guarded UPDATE, records the change and returns the updated
+        note with its items, and whether it changed. A note that already holds ``values``, or
+        is given none, is returned untouched; a missing or locked one raises like the sync
+        controller.
+        """
+        row = None
+        if values:
+            result = await db.execute(SalesNoteController._guarded_update(sales_note_id, allowed_from, values))
+            row = result.first()
+        changed = row is not None
+        if changed:
+            await AsyncSalesNoteController._apply_rollup(db, SalesNoteController._rollup_deltas(row))
+            await AsyncSalesNoteController._record_changes(db, operation, [sales_note_id])
+        else:
+            current = await db.execute(SalesNoteController._current_note(sales_note_id))
+            row = SalesNoteController._unchanged_note(current.first(), allowed_from, detail)
+
+        items = await db.execute(SalesNoteController._note_items(sales_note_id))
+        note = {**SalesNoteController._note_from_row(row), "items": items.mappings().all()}
+        if changed:
+            await db.commit()
+        else:
+            await db.rollback()
+        return note, changed
+
+    @staticmethod
+    async def update_sales_note(db: AsyncSession, sales_note_id: int, sales_note: SalesNoteUpdate):
+        update_data = sales_note.model_dump(exclude_unset=True)
+        if "status" in update_data and update_data["status"] not in VALID_STATUSES:
+            raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(VALID_STATUSES)}")
+
+        # Update sales note data, only while it is still editable
+        note, changed = await AsyncSalesNoteController._apply_guarded_update(
+            db, sales_note_id, EDITABLE_STATUSES, update_data, "updated", "Cannot update a paid or canceled sales note"
+        )
+
+        # Stored renders no longer match the note
+        if changed:
+            await asyncio.to_thread(PDFCache.invalidate, sales_note_id)
+        return note
+
+    @staticmethod
+    async def delete_sales_note(db: AsyncSession, sales_note_id: int):
+        db_sales_note = await AsyncSalesNoteController._get_sales_note_for_update(db, sales_note_id)
+
+        # Check if delete is allowed based on status
+        if db_sales_note.status in ["paid"]:
+            raise HTTPException(status_code=400, detail="Cannot delete a paid sales note")
+
+        await db.execute(delete(SalesNoteItem).where(SalesNoteItem.sales_note_id == sales_note_id))
+        await AsyncSalesNoteController._apply_rollup(db, [SalesNoteRollup.delta(db_sales_note, -1)])
+        await AsyncSalesNoteController._record_changes(db, "deleted", [sales_note_id])
+        await db.delete(db_sales_note)
+        await db.commit()
+        return {"message": "Sales note deleted successfully"}
+
+    @staticmethod
+    async def change_status(db: AsyncSession, sales_note_id: int, status: str):
+        if status not in VALID_STATUSES:
+            raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(VALID_STATUSES)}")
+
+        # Update status where the transition is allowed; stored renders print the old status
+        allowed_from = [current for current, targets in STATUS_TRANSITIONS.items() if status in targets]
+        note, changed = await AsyncSalesNoteController._apply_guarded_update(
+            db, sales_note_id, allowed_from, {"status": status}, "status_changed",
+            "Cannot change status of a {status} sales note"
+        )
+
+        if changed:
+            await asyncio.to_thread(PDFCache.invalidate, sales_note_id)
+        return note
@@ -1,125 +1,66 @@
 # app/middleware/metrics.py for Sales Notes Service
-import os
 import time
-import boto3
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
 from fastapi.responses import JSONResponse
 import logging
 
+from app.utils.metrics_aggregator import MetricsAggregator, metrics_aggregator
+
 # Configure logger
 logger = logging.getLogger("sales_notes_service")
 
-class CloudWatchMetricsMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app):
-        super().__init__(app)
-        self.environment = os.getenv("ENVIRONMENT", "development")
-        self.service_name = "sales-notes-service"
-
-        # Initialize CloudWatch client only in production environment
-        if self.environment == "production":
-            self.cloudwatch = boto3.client('cloudwatch',
-                region_name=os.getenv("AWS_REGION"),
-                aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-                aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY")
-            )
-        else:
-            self.cloudwatch = None
-            logger.info("Running in development mode. CloudWatch metrics disabled.")
+# Dimension used for requests that did not match any route, so unknown URLs cannot create new series
+UNMATCHED_PATH = "unmatched"
+
+class CloudWatchMetricsMiddleware:
+    """
+    Records per-request health, status code and execution time metrics.
+
+    Implemented as a raw ASGI middleware: the response is passed through untouched
+    (no buffering of streamed or file bodies) and only the status line is observed.
+    Requests are labelled with the matched route template, e.g.
+    /api/sales-notes/{sales_note_id}, rather than the concrete URL. Metrics are only
+    aggregated here; the aggregator's background task publishes them.
+    """
+    def __init__(self, app, aggregator: MetricsAggregator = metrics_aggregator):
+        self.app = app
+        self.aggregator = aggregator
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
+        start_time = time.perf_counter()
+        status_code = None
 
-        # Extract path and method for metric dimensions
-        path = request.url.path
-        method = request.method
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
         try:
-            # Process the request and get response
-            response = await call_next(request)
-
-            # Record request success
-            self.record_health_metric(path, method, 1)  # 1 indicates success
-
-            # Calculate execution time
-            execution_time = (time.time() - start_time) * 1000  # Convert to milliseconds
-
-            # Record execution time metric
-            self.record_performance_metric(path, method, execution_time)
-
-            return response
-
+            await self.app(scope, receive, send_with_status)
         except Exception as e:
-            # Record request failure
-            self.record_health_metric(path, method, 0)  # 0 indicates failure
-
-            # Calculate execution time even for failed requests
-            execution_time = (time.time() - start_time) * 1000
-
-            # Record execution time metric
-            self.record_performance_metric(path, method, execution_time)
-
             # Log the error
             logger.error(f"Error processing request: {str(e)}")
 
-            # Return error response
-            return JSONResponse(
-                status_code=500,
-                content={"detail": "Internal Server Error"}
-            )
-
-    def record_health_metric(self, path, method, success):
-        metric_name = "HealthCheck"
+            if status_code is not None:
+                # The response has already started; nothing sensible can be sent anymore
+                self._record(scope, 500, start_time)
+                raise
 
-        # Log metric for development environment
-        if self.environment != "production":
-            logger.info(f"[DEV] {metric_name}: Path={path}, Method={method}, Success={success}")
-            return
+            # Return error response
+            response = JSONResponse(status_code=500, content={"detail": "Internal Server Error"})
+            await response(scope, receive, send_with_status)
 
-        # In production, send to CloudWatch
-        try:
-            self.cloudwatch.put_metric_data(
-                Namespace=f"{self.service_name}/{self.environment}",
-                MetricData=[
-                    {
-                        'MetricName': metric_name,
-                        'Dimensions': [
-                            {'Name': 'Path', 'Value': path},
-                            {'Name': 'Method', 'Value': method},
-                            {'Name': 'Environment', 'Value': self.environment}
-                        ],
-                        'Value': success,
-                        'Unit': 'Count'
-                    }
-                ]
-            )
-        except Exception as e:
-            logger.error(f"Failed to publish health metric to CloudWatch: {str(e)}")
+        self._record(scope, status_code or 500, start_time)
 
-    def record_performance_metric(self, path, method, execution_time):
-        metric_name = "ExecutionTime"
+    def _record(self, scope, status_code: int, start_time: float):
+        execution_time = (time.perf_counter() - start_time) * 1000  # Convert to milliseconds
 
-        # Log metric for development environment
-        if self.environment != "production":
-            logger.info(f"[DEV] {metric_name}: Path={path}, Method={method}, Time={execution_time}ms")
-            return
+        # The router stores the matched route in the scope
+        route = scope.get("route")
+        path = getattr(route, "path", None) or UNMATCHED_PATH
 
-        # In production, send to CloudWatch
-        try:
-            self.cloudwatch.put_metric_data(
-                Namespace=f"{self.service_name}/{self.environment}",
-                MetricData=[
-                    {
-                        'MetricName': metric_name,
-                        'Dimensions': [
-                            {'Name': 'Path', 'Value': path},
-                            {'Name': 'Method', 'Value': method},
-                            {'Name': 'Environment', 'Value': self.environment}
-                        ],
-                        'Value': execution_time,
-                        'Unit': 'Milliseconds'
-                    }
-                ]
-            )
-        except Exception as e:
-            logger.error(f"Failed to publish performance metric to CloudWatch: {str(e)}")
+        self.aggregator.record_request(path, scope["method"], status_code, execution_time)
@@ -0,0 +1,242 @@
+# app/middleware/profiling.py for Sales Notes Service
+import cProfile
+import heapq
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+from app.config import (
+    REQUEST_INSTRUMENTATION,
+    SLOW_QUERY_LOG_COUNT,
+    PROFILE_SAMPLE_RATE,
+    PROFILE_THRESHOLD_MS,
+    PROFILE_DIR,
+    PROFILER,
+)
+from app.middleware.metrics import UNMATCHED_PATH
+from app.utils.metrics_aggregator import MetricsAggregator, metrics_aggregator
+
+# Configure logger
+logger = logging.getLogger("sales_notes_service")
+
+# Statistics of the request being handled; copied into threadpool workers along with the context
+_current_request = ContextVar("current_request", default=None)
+
+# Held while a sampled request runs under a profiler; requests sampled meanwhile run unprofiled
+_profiling = threading.Lock()
+
+
+class RequestStats:
+    """SQL statements, database time and the optional profiler of one request."""
+
+    def __init__(self, profile: bool = False):
+        self.query_count = 0
+        self.db_time = 0.0  # milliseconds
+        self.slowest = []  # min-heap of (milliseconds, statement)
+        self.profile = profile
+        self.profiler = None
+
+    def add_query(self, statement: str, duration: float):
+        self.query_count += 1
+        self.db_time += duration
+        if len(self.slowest) < SLOW_QUERY_LOG_COUNT:
+            heapq.heappush(self.slowest, (duration, statement))
+        elif self.slowest and duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (duration, statement))
+
+    def slowest_statements(self):
+        return sorted(self.slowest, reverse=True)
+
+
+def current_request_stats():
+    return _current_request.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get("query_start_time")
+    if not start_times:
+        return
+    duration = (time.perf_counter() - start_times.pop()) * 1000
+    stats = _current_request.get()
+    if stats is not None:
+        stats.add_query(statement, duration)
+
+
+def instrument_engine(engine):
+    """Times every statement run through the engine (pass ``async_engine.sync_engine`` for async engines)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class _Profiler:
+    """
+    Wraps cProfile or pyinstrument behind start/stop/dump. ``async_mode`` makes pyinstrument
+    follow one coroutine across awaits instead of sampling whatever the event loop runs.
+    """
+
+    def __init__(self, async_mode: bool = False):
+        if PROFILER == "pyinstrument":
+            from pyinstrument import Profiler
+            self._profiler = Profiler(async_mode="enabled" if async_mode else "disabled")
+        else:
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if PROFILER == "pyinstrument":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        if PROFILER == "pyinstrument":
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+
+    def dump(self, base_path: str):
+        if PROFILER == "pyinstrument":
+            path = f"{base_path}.html"
+            with open(path, "w") as output:
+                output.write(self._profiler.output_html())
+        else:
+            path = f"{base_path}.prof"
+            self._profiler.dump_stats(path)
+        return path
+
+
+class ProfiledRoute(APIRoute):
+    """
+    Runs the endpoint under a profiler when the request was sampled for profiling.
+    The endpoint itself is wrapped, so sync endpoints are profiled on the threadpool
+    thread that executes them rather than on the event loop. Coroutine endpoints share
+    the event loop with every other request, which cProfile cannot tell apart, so they
+    are only profiled with pyinstrument in async mode.
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        if iscoroutinefunction(endpoint):
+            @wraps(endpoint)
+            async def profiled_endpoint(*args, **kw):
+                profiler = _start_profiler(async_mode=True) if PROFILER == "pyinstrument" else None
+                try:
+                    return await endpoint(*args, **kw)
+                finally:
+                    _stop_profiler(profiler)
+        else:
+            @wraps(endpoint)
+            def profiled_endpoint(*args, **kw):
+                profiler = _start_profiler()
+                try:
+                    return endpoint(*args, **kw)
+                finally:
+                    _stop_profiler(profiler)
+
+        super().__init__(path, profiled_endpoint, **kwargs)
+
+
+def _start_profiler(async_mode: bool = False):
+    """
+    Starts a profiler for a sampled request. Only one profiler runs at a time (the
+    interpreter allows a single one from Python 3.12 on, and concurrent ones would
+    profile each other's threads), so a request sampled while another one is being
+    profiled runs unprofiled, as does one whose profiler fails to start.
+    """
+    stats = _current_request.get()
+    if stats is None or not stats.profile or not _profiling.acquire(blocking=False):
+        return None
+    try:
+        profiler = _Profiler(async_mode)
+        profiler.start()
+    except Exception as e:
+        _profiling.release()
+        logger.warning(f"Request profiling skipped: {e}")
+        return None
+    return profiler
+
+
+def _stop_profiler(profiler):
+    if profiler is None:
+        return
+    try:
+        profiler.stop()
+        _current_request.get().profiler = profiler
+    finally:
+        _profiling.release()
+
+
+class RequestProfilingMiddleware:
+    """
+    Opt-in (REQUEST_INSTRUMENTATION) per-request instrumentation.
+
+    Collects the number of SQL statements and the database time of each request,
+    sends them in a Server-Timing header and records them as DBQueries/DBTime
+    metrics per route. A PROFILE_SAMPLE_RATE share of requests runs under a
+    profiler; profiles of those slower than PROFILE_THRESHOLD_MS are written to
+    PROFILE_DIR together with a log line listing the slowest statements. Statements
+    run while a streamed body is being sent are counted in the metrics but cannot
+    appear in the already sent header.
+    """
+    def __init__(self, app, aggregator: MetricsAggregator = metrics_aggregator, enabled: bool = REQUEST_INSTRUMENTATION):
+        self.app = app
+        self.aggregator = aggregator
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        stats = RequestStats(profile=PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE)
+        token = _current_request.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total = (time.perf_counter() - start_time) * 1000
+                server_timing = (
+                    f'db;dur={stats.db_time:.1f};desc="{stats.query_count} queries", app;dur={total:.1f}'
+                ).encode("latin-1")
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", server_timing)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_request.reset(token)
+            self._finish(scope, stats, (time.perf_counter() - start_time) * 1000)
+
+    def _finish(self, scope, stats: RequestStats, execution_time: float):
+        route = scope.get("route")
+        path = getattr(route, "path", None) or UNMATCHED_PATH
+        self.aggregator.record_db_usage(path, scope["method"], stats.query_count, stats.db_time)
+
+        if execution_time < PROFILE_THRESHOLD_MS:
+            return
+
+        statements = "; ".join(
+            f"{duration:.1f}ms {' '.join(statement.split())[:200]}" for duration, statement in stats.slowest_statements()
+        )
+        message = (
+            f"Slow request: {scope['method']} {path} took {execution_time:.1f}ms, "
+            f"{stats.query_count} queries in {stats.db_time:.1f}ms. Slowest: {statements or 'none'}"
+        )
+        if stats.profiler is not None:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            name = re.sub(r"[^A-Za-z0-9]+", "_", f"{scope['method']}_{path}").strip("_")
+            base_path = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%dT%H%M%S')}_{name}_{execution_time:.0f}ms")
+            message += f". Profile: {stats.profiler.dump(base_path)}"
+        logger.warning(message)
@@ -0,0 +1,36 @@
+# app/middleware/read_your_writes.py for Sales Notes Service
+import math
+import time
+
+from app.database import DB_REPLICA_URLS, READ_YOUR_WRITES_COOKIE, READ_YOUR_WRITES_WINDOW
+
+# Methods that never change data; every other successful request counts as a write
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReadYourWritesMiddleware:
+    """
+    Sets a short-lived cookie on successful writes. While it is fresh, get_read_db sends the
+    client's reads to the primary, so a client never reads from a replica that has not yet
+    replayed the client's own write. Only active when read replicas are configured.
+    """
+    def __init__(self, app, enabled: bool = bool(DB_REPLICA_URLS), window: float = READ_YOUR_WRITES_WINDOW):
+        self.app = app
+        self.enabled = enabled
+        self.window = window
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = (
+                    f"{READ_YOUR_WRITES_COOKIE}={time.time():.3f}; Max-Age={math.ceil(self.window)}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                ).encode("latin-1")
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", cookie)]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,16 @@
+# app/models/idempotency_key.py
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.database import Base
+
+class IdempotencyKey(Base):
+    """Response of a create request, replayed when the client retries with the same Idempotency-Key."""
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)
+    request_hash = Column(String, nullable=False)  # sha256 of the request body; a reused key must send the same body
+    status_code = Column(Integer)
+    response = Column(JSONB)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)  # swept in bulk once passed
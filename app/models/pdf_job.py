@@ -0,0 +1,18 @@
+# app/models/pdf_job.py
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.database import Base
+
+class PdfJob(Base):
+    __tablename__ = "pdf_jobs"
+
+    id = Column(String, primary_key=True)  # uuid4 hex
+    sales_note_id = Column(Integer, index=True)  # None for batch jobs
+    batch = Column(JSONB)  # Selection of a batch job: sales_note_ids, customer_id, date_from, date_to, merge
+    status = Column(String, nullable=False, default="queued")  # queued, running, done, failed
+    pdf_path = Column(String)  # Path to the rendered PDF once done (the merged document for batches)
+    result = Column(JSONB)  # Report of a finished batch job
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
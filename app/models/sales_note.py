@@ -1,5 +1,6 @@
 # app/models/sales_note.py
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Index
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -17,11 +18,34 @@ class SalesNote(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    # Items are deleted by the database (ON DELETE CASCADE) or explicitly, never loaded just to delete them
+    items = relationship("SalesNoteItem", order_by="SalesNoteItem.id", passive_deletes=True)
+
+    __table_args__ = (
+        # Keyset pagination of the listing, newest first, optionally per customer
+        Index("ix_sales_notes_created_at_id", "created_at", "id"),
+        Index("ix_sales_notes_customer_id_created_at_id", "customer_id", "created_at", "id"),
+        # Date-bounded listings, exports and stats rebuilds, and the archiver's scan for old notes
+        Index("ix_sales_notes_note_date_id", "note_date", "id"),
+        # /search filters: status or customer with a date range, amount ranges and note-number prefixes.
+        # Sort keys end in id, the keyset tie-breaker, so pages after the first are read from the index in order
+        Index("ix_sales_notes_status_note_date_id", "status", "note_date", "id"),
+        Index("ix_sales_notes_customer_id_note_date_id", "customer_id", "note_date", "id"),
+        Index("ix_sales_notes_total_amount_id", "total_amount", "id"),
+        # LIKE 'prefix%' can only use an index with pattern ops unless the database collation is C
+        Index("ix_sales_notes_note_number_pattern", "note_number", postgresql_ops={"note_number": "text_pattern_ops"}),
+    )
+
 class SalesNoteItem(Base):
     __tablename__ = "sales_note_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    sales_note_id = Column(Integer, nullable=False)
+    sales_note_id = Column(
+        Integer,
+        ForeignKey("sales_notes.id", ondelete="CASCADE", name="fk_sales_note_items_sales_note_id"),
+        nullable=False,
+        index=True
+    )
     product_id = Column(Integer, nullable=False)
     quantity = Column(Integer, nullable=False)
     unit_price = Column(Float, nullable=False)
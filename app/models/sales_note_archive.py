@@ -0,0 +1,57 @@
+# app/models/sales_note_archive.py
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index, and_
+from sqlalchemy.orm import relationship, foreign
+from app.database import Base
+
+class SalesNoteArchive(Base):
+    """
+    Paid and canceled notes moved out of sales_notes by "manage.py archive-notes".
+    Range partitioned by note_date, one partition per year, so date-bounded reads only
+    touch the years they ask for; the partitions are created by the maintenance commands.
+    """
+    __tablename__ = "sales_notes_archive"
+
+    id = Column(Integer, primary_key=True)
+    note_date = Column(DateTime, primary_key=True)  # partition key, so part of every unique key
+    note_number = Column(String, nullable=False)
+    customer_id = Column(Integer, nullable=False)
+    total_amount = Column(Float, nullable=False)
+    tax_amount = Column(Float, nullable=False)
+    status = Column(String, nullable=False)
+    pdf_path = Column(String)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+
+    items = relationship(
+        "SalesNoteItemArchive",
+        primaryjoin=lambda: and_(
+            SalesNoteArchive.id == foreign(SalesNoteItemArchive.sales_note_id),
+            SalesNoteArchive.note_date == foreign(SalesNoteItemArchive.note_date)
+        ),
+        order_by="SalesNoteItemArchive.id",
+        viewonly=True
+    )
+
+    __table_args__ = (
+        Index("ix_sales_notes_archive_customer_id_note_date", "customer_id", "note_date"),
+        {"postgresql_partition_by": "RANGE (note_date)"},
+    )
+
+class SalesNoteItemArchive(Base):
+    """Items of archived notes, carrying their note's note_date so they are partitioned alike."""
+    __tablename__ = "sales_note_items_archive"
+
+    id = Column(Integer, primary_key=True)
+    note_date = Column(DateTime, primary_key=True)
+    sales_note_id = Column(Integer, nullable=False)
+    product_id = Column(Integer, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    unit_price = Column(Float, nullable=False)
+    subtotal = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index("ix_sales_note_items_archive_sales_note_id", "sales_note_id"),
+        {"postgresql_partition_by": "RANGE (note_date)"},
+    )
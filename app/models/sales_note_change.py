@@ -0,0 +1,26 @@
+# app/models/sales_note_change.py
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.database import Base
+
+class SalesNoteChange(Base):
+    """
+    Transactional outbox of sales-note writes, served by GET /api/sales-notes/changes.
+    Rows are inserted in the same transaction as the change they describe.
+    """
+    __tablename__ = "sales_note_changes"
+
+    seq = Column(BigInteger, primary_key=True)
+    # Writing transaction; the feed only serves transactions older than every running one
+    txid = Column(BigInteger, nullable=False, server_default=text("pg_current_xact_id()::text::bigint"))
+    sales_note_id = Column(Integer, nullable=False)
+    operation = Column(String, nullable=False)  # created, updated, status_changed, deleted
+    status = Column(String)
+    note = Column(JSONB)  # the note's columns after the change (before it, for deletes)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    __table_args__ = (
+        # Feed order
+        Index("ix_sales_note_changes_txid_seq", "txid", "seq"),
+    )
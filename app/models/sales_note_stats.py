@@ -0,0 +1,19 @@
+# app/models/sales_note_stats.py
+from sqlalchemy import Column, Integer, String, Float, Date, Index
+from app.database import Base
+
+class SalesNoteDailyStat(Base):
+    """Per day, customer and status rollup of sales notes, kept current by the write paths."""
+    __tablename__ = "sales_note_daily_stats"
+
+    day = Column(Date, primary_key=True)
+    customer_id = Column(Integer, primary_key=True)
+    status = Column(String, primary_key=True)
+    note_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0)
+    tax_amount = Column(Float, nullable=False, default=0)
+
+    __table_args__ = (
+        # Per-customer stats over a date range
+        Index("ix_sales_note_daily_stats_customer_id_day", "customer_id", "day"),
+    )
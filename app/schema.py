@@ -0,0 +1,94 @@
+# app/schema.py
+"""
+Schema setup for the service's tables, run by ``python manage.py migrate`` before the
+app starts rather than on import.
+"""
+import time
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import AddConstraint, CreateIndex
+
+from app.database import get_engine
+from app.models.sales_note import SalesNote, SalesNoteItem
+from app.models.pdf_job import PdfJob
+from app.models.sales_note_stats import SalesNoteDailyStat
+from app.models.idempotency_key import IdempotencyKey
+from app.models.sales_note_archive import SalesNoteArchive, SalesNoteItemArchive
+from app.models.sales_note_change import SalesNoteChange
+
+TABLES = (
+    SalesNote.__table__,
+    SalesNoteItem.__table__,
+    PdfJob.__table__,
+    SalesNoteDailyStat.__table__,
+    IdempotencyKey.__table__,
+    SalesNoteArchive.__table__,
+    SalesNoteItemArchive.__table__,
+    SalesNoteChange.__table__,
+)
+
+# Existing indexes of a table; an interrupted concurrent build leaves an invalid one behind
+TABLE_INDEXES = text(
+    "SELECT c.relname, i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+    "WHERE i.indrelid = CAST(:table AS regclass)"
+)
+
+IS_PARTITIONED = text("SELECT relkind = 'p' FROM pg_class WHERE oid = CAST(:table AS regclass)")
+
+# Advisory lock key held while migrating, so overlapping runs apply the schema one after the other
+MIGRATION_LOCK = 5120_0001
+
+
+def create_missing_indexes(engine, table):
+    """
+    Builds the table's missing indexes with CREATE INDEX CONCURRENTLY, which does not block
+    writes but cannot run inside a transaction. An index left invalid by an interrupted
+    build is dropped and built again. PostgreSQL cannot build indexes on partitioned tables
+    concurrently; those (the archive, written only by the archiver) are built normally.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        concurrently = not conn.execute(IS_PARTITIONED, {"table": table.name}).scalar()
+        existing = dict(conn.execute(TABLE_INDEXES, {"table": table.name}).all())
+        for index in table.indexes:
+            if existing.get(index.name):
+                continue
+            if index.name in existing and concurrently:
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index.name}"))
+            statement = str(CreateIndex(index, if_not_exists=True).compile(dialect=engine.dialect))
+            if concurrently:
+                statement = statement.replace("INDEX", "INDEX CONCURRENTLY", 1)
+            conn.exec_driver_sql(statement)
+
+
+def create_schema(engine=None):
+    """
+    Creates missing tables, and indexes and foreign keys added to tables that already exist.
+    Meant for a one-off deploy step (python manage.py migrate) rather than every app start:
+    building indexes on a large table takes a while even without blocking writes.
+    """
+    engine = engine or get_engine()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as lock:
+        # Polled rather than waited for: a session blocked in pg_advisory_lock holds a snapshot,
+        # which CREATE INDEX CONCURRENTLY in the running migration would wait for in turn
+        while not lock.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": MIGRATION_LOCK}).scalar():
+            time.sleep(1)
+        try:
+            _create_schema(engine)
+        finally:
+            lock.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK})
+
+
+def _create_schema(engine):
+    for table in TABLES:
+        if inspect(engine).has_table(table.name):
+            create_missing_indexes(engine, table)
+        else:
+            # A new table is empty, so it is created together with its indexes
+            table.create(bind=engine)
+
+        existing_foreign_keys = {fk["name"] for fk in inspect(engine).get_foreign_keys(table.name)}
+        for constraint in table.foreign_key_constraints:
+            if constraint.name not in existing_foreign_keys:
+                # NOT VALID enforces the key for new rows without scanning existing ones
+                with engine.begin() as conn:
+                    conn.execute(text(f"{AddConstraint(constraint).compile(dialect=engine.dialect)} NOT VALID"))
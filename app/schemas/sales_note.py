@@ -1,5 +1,5 @@
 # app/schemas/sales_note.py
-from typing import List, Optional
+from typing import List, Optional, Union
 from pydantic import BaseModel, Field
 from datetime import datetime
 
@@ -46,3 +46,86 @@ class SalesNoteResponse(SalesNoteBase):
 
     class Config:
         from_attributes = True
+
+class SalesNoteBulkResult(BaseModel):
+    index: int
+    success: bool
+    sales_note_id: Optional[int] = None
+    note_number: Optional[str] = None
+    error: Optional[str] = None
+
+class SalesNoteBulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[SalesNoteBulkResult]
+
+class SalesNoteStatusBulkRequest(BaseModel):
+    sales_note_ids: List[int] = Field(min_length=1)
+    status: str
+
+class SalesNoteStatusResult(BaseModel):
+    sales_note_id: int
+    success: bool
+    old_status: Optional[str] = None
+    status: Optional[str] = None
+    unchanged: bool = False  # already in the requested status, left untouched
+    error: Optional[str] = None
+
+class SalesNoteStatusBulkResponse(BaseModel):
+    updated: int
+    unchanged: int = 0
+    failed: int
+    results: List[SalesNoteStatusResult]
+
+class PdfJobResponse(BaseModel):
+    id: str
+    sales_note_id: Optional[int] = None
+    status: str
+    pdf_path: Optional[str] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class LookupCacheInvalidate(BaseModel):
+    customer_ids: Optional[List[int]] = None
+    product_ids: Optional[List[int]] = None
+    everything: bool = False
+
+class PdfBatchRequest(BaseModel):
+    sales_note_ids: Optional[List[int]] = None
+    customer_id: Optional[int] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    merge: bool = False
+
+class SalesNoteStatsGroup(BaseModel):
+    key: Union[int, str]
+    note_count: int
+    total_amount: float
+    tax_amount: float
+
+class SalesNoteStatsTotals(BaseModel):
+    note_count: int
+    total_amount: float
+    tax_amount: float
+
+class SalesNoteStatsResponse(BaseModel):
+    group_by: str
+    groups: List[SalesNoteStatsGroup]
+    totals: SalesNoteStatsTotals
+
+class SalesNoteChange(BaseModel):
+    seq: int
+    sales_note_id: int
+    operation: str
+    status: Optional[str] = None
+    note: Optional[dict] = None
+    changed_at: datetime
+
+class SalesNoteChangesResponse(BaseModel):
+    changes: List[SalesNoteChange]
+    next_since: int
@@ -0,0 +1,110 @@
+# app/utils/archive.py
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import ARCHIVE_BATCH_SIZE
+
+ARCHIVE_TABLES = ("sales_notes_archive", "sales_note_items_archive")
+
+# Statuses no write path can move a note out of, so archived notes never change again
+CLOSED_STATUSES = ("paid", "canceled")
+
+NOTE_COLUMNS = ("id", "note_number", "customer_id", "total_amount", "tax_amount", "note_date", "status", "pdf_path",
+                "created_at", "updated_at")
+ITEM_COLUMNS = ("id", "sales_note_id", "product_id", "quantity", "unit_price", "subtotal", "created_at", "updated_at")
+
+
+class SalesNoteArchiver:
+    """
+    Moves closed notes out of sales_notes into the yearly range partitions of
+    sales_notes_archive / sales_note_items_archive.
+
+    The live tables stay small and keep their global keys (note ids, note numbers, item
+    foreign keys), while history is stored once per year in partitions that date-bounded
+    reads can prune. Archived notes keep counting in sales_note_daily_stats.
+    """
+
+    @staticmethod
+    def partition_name(table: str, year: int):
+        return f"{table}_y{year}"
+
+    @staticmethod
+    def ensure_partitions(db: Session, first_year: int, last_year: int):
+        """Creates the archive partitions for first_year..last_year that do not exist yet; returns their names."""
+        existing = {
+            row[0] for row in db.execute(
+                text("SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                     "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = ANY(:tables)"),
+                {"tables": list(ARCHIVE_TABLES)}
+            )
+        }
+        created = []
+        for year in range(first_year, last_year + 1):
+            for table in ARCHIVE_TABLES:
+                name = SalesNoteArchiver.partition_name(table, year)
+                if name in existing:
+                    continue
+                db.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+                ))
+                created.append(name)
+        db.commit()
+        return created
+
+    @staticmethod
+    def archive(db: Session, before: datetime, batch_size: int = ARCHIVE_BATCH_SIZE):
+        """
+        Moves paid and canceled notes dated before ``before``, with their items, in
+        transactions of batch_size notes. Rows locked by a concurrent change are skipped
+        and picked up by a later run. Returns the number of notes moved.
+        """
+        moved = 0
+        while True:
+            batch = db.execute(
+                text("SELECT id, note_date FROM sales_notes "
+                     "WHERE status = ANY(:statuses) AND note_date < :before "
+                     "ORDER BY note_date, id LIMIT :batch_size FOR UPDATE SKIP LOCKED"),
+                {"statuses": list(CLOSED_STATUSES), "before": before, "batch_size": batch_size}
+            ).all()
+            if not batch:
+                db.rollback()
+                return moved
+
+            years = [row.note_date.year for row in batch]
+            # Creating a partition commits, which would drop the row locks taken above
+            if SalesNoteArchiver._missing_partitions(db, min(years), max(years)):
+                db.rollback()
+                SalesNoteArchiver.ensure_partitions(db, min(years), max(years))
+                continue
+
+            ids = [row.id for row in batch]
+            note_columns = ", ".join(NOTE_COLUMNS)
+            db.execute(
+                text(f"INSERT INTO sales_note_items_archive (note_date, {', '.join(ITEM_COLUMNS)}) "
+                     f"SELECT n.note_date, {', '.join('i.' + name for name in ITEM_COLUMNS)} "
+                     "FROM sales_note_items i JOIN sales_notes n ON n.id = i.sales_note_id "
+                     "WHERE i.sales_note_id = ANY(:ids)"),
+                {"ids": ids}
+            )
+            db.execute(text("DELETE FROM sales_note_items WHERE sales_note_id = ANY(:ids)"), {"ids": ids})
+            db.execute(
+                text(f"WITH moved AS (DELETE FROM sales_notes WHERE id = ANY(:ids) RETURNING {note_columns}) "
+                     f"INSERT INTO sales_notes_archive ({note_columns}) SELECT {note_columns} FROM moved"),
+                {"ids": ids}
+            )
+            db.commit()
+            moved += len(ids)
+
+    @staticmethod
+    def _missing_partitions(db: Session, first_year: int, last_year: int):
+        expected = [
+            SalesNoteArchiver.partition_name(table, year)
+            for year in range(first_year, last_year + 1) for table in ARCHIVE_TABLES
+        ]
+        found = db.execute(
+            text("SELECT count(*) FROM pg_class WHERE relname = ANY(:names)"), {"names": expected}
+        ).scalar()
+        return found < len(expected)
@@ -0,0 +1,140 @@
+# app/utils/change_feed.py
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import CHANGE_FEED_POLL_INTERVAL, CHANGE_FEED_HEARTBEAT
+from app.database import SessionLocal, get_engine
+from app.utils.fast_json import SalesNoteSerializer
+
+CHANGE_COLUMNS = ("seq", "sales_note_id", "operation", "status", "note", "changed_at")
+
+# Every write path records its notes' new state with this statement before committing
+RECORD_CHANGES = text(
+    "INSERT INTO sales_note_changes (sales_note_id, operation, status, note) "
+    "SELECT n.id, :operation, n.status, to_jsonb(n) FROM sales_notes n WHERE n.id = ANY(:ids) ORDER BY n.id"
+)
+
+# Changes after a position, limited to transactions that finished before every still running
+# one started: a change committed later always sorts after everything served here
+READ_CHANGES = text(
+    f"SELECT {', '.join(CHANGE_COLUMNS)} FROM sales_note_changes "
+    "WHERE (txid, seq) > (:txid, :seq) AND txid < pg_snapshot_xmin(pg_current_snapshot())::text::bigint "
+    "ORDER BY txid, seq LIMIT :limit"
+)
+
+# Where a position stands: its transaction if the change is kept, and the oldest change kept
+READ_POSITION = text(
+    "SELECT (SELECT txid FROM sales_note_changes WHERE seq = :seq) AS txid, "
+    "(SELECT min(seq) FROM sales_note_changes) AS first_seq"
+)
+
+
+class UnknownChangePosition(ValueError):
+    """Raised for a ``since`` the feed never handed out, e.g. a corrupted or future cursor."""
+
+
+class SalesNoteChangeFeed:
+    """
+    Transactional outbox behind GET /api/sales-notes/changes.
+
+    Write paths insert one row per changed note in their own transaction, so the feed
+    holds exactly the committed changes. Consumers pass back the seq of the last change
+    they processed as ``since`` and receive the next ones, which costs one index range
+    scan however large sales_notes is. Changes are ordered by writing transaction, then
+    seq, because seqs are drawn before commit and a transaction that commits late would
+    otherwise land behind a position a consumer has already passed.
+    """
+
+    @staticmethod
+    def record(db: Session, operation: str, sales_note_ids):
+        if sales_note_ids:
+            db.execute(RECORD_CHANGES, {"operation": operation, "ids": list(sales_note_ids)})
+
+    @staticmethod
+    def read(db: Session, since: int, limit: int):
+        """
+        Returns (changes, next since). Raises ValueError when ``since`` was pruned, i.e. lies
+        before the oldest change kept, and UnknownChangePosition when no change ever had that
+        seq; the consumer has to resynchronise in both cases. A replica that has not replayed
+        ``since`` yet is asked about it on the primary and answers with no changes for now.
+        """
+        txid = 0
+        if since:
+            position = db.execute(READ_POSITION, {"seq": since}).first()
+            if position.txid is None and db.info.get("replica") is not None and not db.info.get("wrote"):
+                with get_engine().connect() as conn:
+                    if conn.execute(READ_POSITION, {"seq": since}).first().txid is not None:
+                        return [], since
+            if position.txid is None:
+                if position.first_seq is not None and since < position.first_seq:
+                    raise ValueError(f"Change {since} was pruned from the feed")
+                raise UnknownChangePosition(f"Change {since} is not a position of the feed")
+            txid = position.txid
+
+        changes = [
+            dict(zip(CHANGE_COLUMNS, row))
+            for row in db.execute(READ_CHANGES, {"txid": txid, "seq": since, "limit": limit})
+        ]
+        return changes, changes[-1]["seq"] if changes else since
+
+    @staticmethod
+    def _read(since: int, limit: int, replica=None):
+        db = SessionLocal()
+        db.info["replica"] = replica
+        try:
+            return SalesNoteChangeFeed.read(db, since, limit)
+        finally:
+            db.close()
+
+    @staticmethod
+    async def poll(since: int, limit: int, wait: float = 0, replica=None):
+        """Long poll: returns as soon as there are changes after ``since``, or empty after ``wait`` seconds."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        while True:
+            changes, next_since = await asyncio.to_thread(SalesNoteChangeFeed._read, since, limit, replica)
+            remaining = deadline - loop.time()
+            if changes or remaining <= 0:
+                return changes, next_since
+            await asyncio.sleep(min(CHANGE_FEED_POLL_INTERVAL, remaining))
+
+    @staticmethod
+    async def stream(since: int, limit: int, is_disconnected, replica=None, changes=()):
+        """
+        Yields server-sent events, one per change with its seq as the event id, starting
+        with ``changes``. A backlog is sent in batches of ``limit`` without pausing; once
+        caught up the feed is checked every CHANGE_FEED_POLL_INTERVAL seconds.
+        """
+        idle = 0.0
+        while True:
+            if changes:
+                yield "".join(
+                    f"id: {change['seq']}\nevent: {change['operation']}\n"
+                    f"data: {SalesNoteChangeFeed.dumps(change)}\n\n"
+                    for change in changes
+                )
+                idle = 0.0
+            elif idle >= CHANGE_FEED_HEARTBEAT:
+                yield ": keep-alive\n\n"
+                idle = 0.0
+
+            if await is_disconnected():
+                return
+            if len(changes) < limit:
+                await asyncio.sleep(CHANGE_FEED_POLL_INTERVAL)
+                idle += CHANGE_FEED_POLL_INTERVAL
+            changes, since = await asyncio.to_thread(SalesNoteChangeFeed._read, since, limit, replica)
+
+    @staticmethod
+    def dumps(change) -> str:
+        return SalesNoteSerializer.dumps(change).decode()
+
+    @staticmethod
+    def prune(db: Session, before: datetime):
+        """Deletes changes recorded before ``before``; returns the number deleted."""
+        result = db.execute(text("DELETE FROM sales_note_changes WHERE changed_at < :before"), {"before": before})
+        db.commit()
+        return result.rowcount
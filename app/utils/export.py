@@ -0,0 +1,150 @@
+# app/utils/export.py
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import select, union_all
+
+from app.database import SessionLocal
+from app.models.sales_note import SalesNote, SalesNoteItem
+from app.models.sales_note_archive import SalesNoteArchive, SalesNoteItemArchive
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_FETCH_SIZE = 1000
+# Approximate number of characters buffered before a chunk is handed to the response
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+NOTE_COLUMNS = ["id", "note_number", "customer_id", "total_amount", "tax_amount", "note_date", "status",
+                "pdf_path", "created_at", "updated_at"]
+ITEM_COLUMNS = ["id", "product_id", "quantity", "unit_price", "subtotal"]
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class SalesNoteExporter:
+    """
+    Streams sales notes as NDJSON or CSV with bounded memory.
+
+    Rows are read as plain tuples from a server-side cursor and written out in chunks,
+    so neither ORM objects nor response models are built, and memory use does not
+    depend on the number of exported rows. The exporter opens its own session because
+    the response body is produced after the request handler has returned.
+    """
+
+    @staticmethod
+    def _select(notes, items, date_from: datetime = None, date_to: datetime = None, customer_id: int = None,
+                include_items: bool = False):
+        columns = [notes.c[name] for name in NOTE_COLUMNS]
+        source = notes
+        if include_items:
+            columns += [items.c[name].label(f"item_{name}") for name in ITEM_COLUMNS]
+            condition = items.c.sales_note_id == notes.c.id
+            if "note_date" in items.c:
+                # Archived items are partitioned like their notes, so the join pairs partitions
+                condition = condition & (items.c.note_date == notes.c.note_date)
+            source = notes.outerjoin(items, condition)
+
+        statement = select(*columns).select_from(source)
+        if date_from is not None:
+            statement = statement.where(notes.c.note_date >= date_from)
+        if date_to is not None:
+            statement = statement.where(notes.c.note_date < date_to)
+        if customer_id is not None:
+            statement = statement.where(notes.c.customer_id == customer_id)
+        return statement
+
+    @staticmethod
+    def _statement(date_from: datetime = None, date_to: datetime = None, customer_id: int = None,
+                   include_items: bool = False, include_archived: bool = False):
+        """
+        Selects the live notes, followed in date order by the archived ones when requested.
+        The date bounds are repeated on the archive branch so only the partitions of the
+        requested years are scanned.
+        """
+        filters = (date_from, date_to, customer_id, include_items)
+        statement = SalesNoteExporter._select(SalesNote.__table__, SalesNoteItem.__table__, *filters)
+        if include_archived:
+            statement = union_all(
+                statement,
+                SalesNoteExporter._select(SalesNoteArchive.__table__, SalesNoteItemArchive.__table__, *filters)
+            )
+
+        columns = statement.selected_columns
+        order_by = [columns.note_date, columns.id]
+        if include_items:
+            order_by.append(columns.item_id)
+        return statement.order_by(*order_by).execution_options(yield_per=EXPORT_FETCH_SIZE)
+
+    @staticmethod
+    def _rows(statement, replica=None):
+        db = SessionLocal()
+        db.info["replica"] = replica
+        try:
+            for row in db.execute(statement):
+                yield row
+        finally:
+            db.close()
+
+    @staticmethod
+    def ndjson(date_from: datetime = None, date_to: datetime = None, customer_id: int = None,
+               include_items: bool = False, replica=None, include_archived: bool = False):
+        """Yields NDJSON chunks, one sales note per line with its items nested when requested."""
+        statement = SalesNoteExporter._statement(date_from, date_to, customer_id, include_items, include_archived)
+        note_width = len(NOTE_COLUMNS)
+        buffer = []
+        size = 0
+        current = None
+
+        def encode(note):
+            return json.dumps(note, default=_json_default) + "\n"
+
+        for row in SalesNoteExporter._rows(statement, replica):
+            if current is None or current["id"] != row[0]:
+                if current is not None:
+                    line = encode(current)
+                    buffer.append(line)
+                    size += len(line)
+                    if size >= EXPORT_CHUNK_SIZE:
+                        yield "".join(buffer)
+                        buffer, size = [], 0
+                current = dict(zip(NOTE_COLUMNS, row[:note_width]))
+                if include_items:
+                    current["items"] = []
+
+            if include_items and row[note_width] is not None:
+                item = dict(zip(ITEM_COLUMNS, row[note_width:]))
+                item["sales_note_id"] = current["id"]
+                current["items"].append(item)
+
+        if current is not None:
+            buffer.append(encode(current))
+        if buffer:
+            yield "".join(buffer)
+
+    @staticmethod
+    def csv(date_from: datetime = None, date_to: datetime = None, customer_id: int = None,
+            include_items: bool = False, replica=None, include_archived: bool = False):
+        """Yields CSV chunks; with items there is one row per item and note columns are repeated."""
+        statement = SalesNoteExporter._statement(date_from, date_to, customer_id, include_items, include_archived)
+        output = io.StringIO()
+        writer = csv.writer(output)
+
+        header = list(NOTE_COLUMNS)
+        if include_items:
+            header += [f"item_{name}" for name in ITEM_COLUMNS]
+        writer.writerow(header)
+
+        for row in SalesNoteExporter._rows(statement, replica):
+            writer.writerow(value.isoformat() if isinstance(value, datetime) else value for value in row)
+            if output.tell() >= EXPORT_CHUNK_SIZE:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+
+        if output.tell():
+            yield output.getvalue()
@@ -0,0 +1,58 @@
+# app/utils/fast_json.py
+import orjson
+from fastapi import Response
+
+from app.models.sales_note import SalesNote, SalesNoteItem
+from app.schemas.sales_note import SalesNoteResponse, SalesNoteItemResponse
+
+# Response fields in model order, so documents serialise to the same bytes FastAPI writes
+NOTE_FIELDS = tuple(name for name in SalesNoteResponse.model_fields if name != "items")
+ITEM_FIELDS = tuple(SalesNoteItemResponse.model_fields)
+
+
+class SalesNoteSerializer:
+    """
+    Fast path for sales-note read responses (FAST_JSON_RESPONSES).
+
+    Notes and items are selected as plain column tuples, zipped into dicts in response
+    field order and encoded by orjson, skipping ORM object construction and the
+    response-model validation and re-encoding that FastAPI does for every row. Rows
+    come straight from the typed columns, so there is nothing to validate.
+    """
+
+    @staticmethod
+    def note_columns(table=SalesNote.__table__):
+        """Response columns of sales_notes, or of a table with the same columns such as the archive."""
+        return [table.c[name] for name in NOTE_FIELDS]
+
+    @staticmethod
+    def item_columns(table=SalesNoteItem.__table__):
+        return [table.c[name] for name in ITEM_FIELDS]
+
+    @staticmethod
+    def documents(note_rows, item_rows=()):
+        """Builds response documents from note and item rows; items must be ordered by id."""
+        documents = []
+        by_id = {}
+        for row in note_rows:
+            document = dict(zip(NOTE_FIELDS, row))
+            document["items"] = []
+            documents.append(document)
+            by_id[document["id"]] = document
+        sales_note_id = ITEM_FIELDS.index("sales_note_id")
+        for row in item_rows:
+            by_id[row[sales_note_id]]["items"].append(dict(zip(ITEM_FIELDS, row)))
+        return documents
+
+    @staticmethod
+    def dumps(content) -> bytes:
+        # Pydantic writes UTC datetimes with a "Z" suffix
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered by orjson; content must already be plain dicts and lists."""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return SalesNoteSerializer.dumps(content)
@@ -0,0 +1,99 @@
+# app/utils/http_cache.py
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
+
+from app.config import PDF_PRESIGNED_URLS
+from app.utils.pdf_cache import PDFCache
+from app.utils.storage import pdf_storage
+
+# Clients may keep a copy but must revalidate it, since a note's PDF changes whenever the note does
+PDF_CACHE_CONTROL = "private, no-cache"
+
+
+def _etag_matches(if_none_match: str, etag: str):
+    """Weak comparison as required for If-None-Match (RFC 9110 13.1.2)."""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def is_not_modified(request: Request, etag: str, last_modified: float = None):
+    """
+    Evaluates If-None-Match, falling back to If-Modified-Since only when the client sent
+    no entity tags.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have one second resolution
+        return int(last_modified) <= since
+    return False
+
+
+def not_modified_response(etag: str, last_modified: float = None):
+    headers = {"ETag": etag, "Cache-Control": PDF_CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    return Response(status_code=304, headers=headers)
+
+
+def stored_pdf_response(request: Request, location: str, filename: str):
+    """
+    Serves a stored PDF with a strong ETag and Last-Modified, answering conditional
+    requests with 304. Local files are sent by FileResponse, which also handles byte
+    ranges and If-Range. Object-store files are redirected to a presigned URL when
+    PDF_PRESIGNED_URLS is enabled and proxied otherwise. Returns None if the file is gone.
+    """
+    key = pdf_storage.key_of(location)
+    stat = pdf_storage.stat(key) if key else None
+    if stat is None:
+        return None
+    size, last_modified = stat
+
+    fingerprint = PDFCache.fingerprint_of(location)
+    # Stored renders are named after their content; other files fall back to size and mtime
+    etag = f'"{fingerprint}"' if fingerprint else f'"{int(last_modified)}-{size}"'
+
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    if PDF_PRESIGNED_URLS:
+        url = pdf_storage.presigned_url(key, filename)
+        if url is not None:
+            # Presigned URLs expire, so the redirect itself must not be cached
+            return RedirectResponse(url, status_code=307, headers={"Cache-Control": "no-store"})
+
+    headers = {"ETag": etag, "Cache-Control": PDF_CACHE_CONTROL}
+    path = pdf_storage.local_path(key)
+    if path is not None:
+        return FileResponse(path, media_type="application/pdf", filename=filename, headers=headers)
+
+    headers.update({
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        "Content-Length": str(size),
+        "Content-Disposition": f'attachment; filename="{filename}"'
+    })
+    return StreamingResponse(pdf_storage.iter_bytes(key), media_type="application/pdf", headers=headers)
+
+
+def pdf_bytes_response(content: bytes, fingerprint: str, filename: str):
+    """Serves a PDF rendered in memory, tagged with its render fingerprint."""
+    return Response(
+        content,
+        media_type="application/pdf",
+        headers={
+            "ETag": f'"{fingerprint[:32]}"',
+            "Cache-Control": PDF_CACHE_CONTROL,
+            "Content-Disposition": f'attachment; filename="{filename}"'
+        }
+    )
@@ -0,0 +1,128 @@
+# app/utils/idempotency.py
+import asyncio
+import hashlib
+import json
+import logging
+from datetime import timedelta
+
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.config import IDEMPOTENCY_KEY_TTL, IDEMPOTENCY_SWEEP_INTERVAL, IDEMPOTENCY_SWEEP_BATCH
+from app.database import SessionLocal
+from app.models.idempotency_key import IdempotencyKey
+
+# Configure logger
+logger = logging.getLogger("sales_notes_service")
+
+# Longest Idempotency-Key header accepted
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyKeys:
+    """
+    Statements behind Idempotency-Key support, shared by the sync and async controllers.
+
+    A create first looks the key up; a stored response is replayed at the cost of one
+    primary-key lookup. Otherwise it claims the key with an INSERT in the same transaction
+    as the note, so a concurrent duplicate blocks on the key until the first attempt
+    commits (and then replays its response) or rolls back (and then creates the note itself).
+    """
+
+    @staticmethod
+    def fingerprint(payload: dict) -> str:
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+    @staticmethod
+    def lookup(key: str):
+        table = IdempotencyKey.__table__
+        return select(table.c.request_hash, table.c.status_code, table.c.response).where(
+            table.c.key == key, table.c.expires_at > func.now()
+        )
+
+    @staticmethod
+    def claim(key: str, request_hash: str):
+        """INSERT returning the key when it was free or had expired, and no row when another request holds it."""
+        table = IdempotencyKey.__table__
+        statement = pg_insert(table).values(
+            key=key,
+            request_hash=request_hash,
+            expires_at=func.now() + timedelta(seconds=IDEMPOTENCY_KEY_TTL)
+        )
+        return statement.on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={
+                "request_hash": statement.excluded.request_hash,
+                "status_code": None,
+                "response": None,
+                "created_at": func.now(),
+                "expires_at": statement.excluded.expires_at,
+            },
+            where=table.c.expires_at <= func.now()
+        ).returning(table.c.key)
+
+    @staticmethod
+    def store(key: str, status_code: int, response):
+        table = IdempotencyKey.__table__
+        return update(table).where(table.c.key == key).values(status_code=status_code, response=response)
+
+    @staticmethod
+    def sweep_statement(batch_size: int = IDEMPOTENCY_SWEEP_BATCH):
+        """Deletes up to batch_size expired keys, skipping any a retry is reclaiming right now."""
+        table = IdempotencyKey.__table__
+        expired = (
+            select(table.c.key)
+            .where(table.c.expires_at <= func.now())
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        return delete(table).where(table.c.key.in_(expired.scalar_subquery()))
+
+    @staticmethod
+    def sweep(batch_size: int = IDEMPOTENCY_SWEEP_BATCH):
+        """Deletes every expired key in batches of batch_size, one short transaction each. Returns the number deleted."""
+        deleted = 0
+        db = SessionLocal()
+        try:
+            while True:
+                result = db.execute(IdempotencyKeys.sweep_statement(batch_size))
+                db.commit()
+                deleted += result.rowcount
+                if result.rowcount < batch_size:
+                    return deleted
+        finally:
+            db.close()
+
+
+class IdempotencyKeySweeper:
+    """Background task removing expired idempotency keys every IDEMPOTENCY_SWEEP_INTERVAL seconds."""
+
+    def __init__(self, interval: float = IDEMPOTENCY_SWEEP_INTERVAL):
+        self.interval = interval
+        self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                deleted = await asyncio.to_thread(IdempotencyKeys.sweep)
+                if deleted:
+                    logger.info(f"Swept {deleted} expired idempotency keys")
+            except Exception as e:
+                logger.error(f"Idempotency key sweep failed: {str(e)}")
+
+    def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+idempotency_key_sweeper = IdempotencyKeySweeper()
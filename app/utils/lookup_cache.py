@@ -0,0 +1,107 @@
+# app/utils/lookup_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import ENVIRONMENT, LOOKUP_CACHE_MAX_SIZE, LOOKUP_CACHE_TTL
+from app.utils.metrics_aggregator import MetricsAggregator, metrics_aggregator
+
+
+class LookupCache:
+    """
+    Read-through cache of reference rows (customers, products) keyed by id.
+
+    Entries are evicted least recently used beyond ``max_size`` and expire ``ttl``
+    seconds after they were loaded. Misses of a multi-key lookup are fetched together
+    with one ``WHERE id = ANY(...)`` query. Ids that do not exist are not cached, so
+    newly created rows are visible immediately. The cache is per process.
+    """
+
+    def __init__(self, table: str, columns: list, max_size: int = LOOKUP_CACHE_MAX_SIZE, ttl: float = LOOKUP_CACHE_TTL):
+        self.table = table
+        self.columns = columns
+        self.max_size = max_size
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, db: Session, ids):
+        """Returns a dict of id -> row (as a dict) for the ids that exist."""
+        found = {}
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            for key in set(ids):
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[1]
+                else:
+                    missing.append(key)
+            self.hits += len(found)
+            self.misses += len(missing)
+
+        if missing:
+            rows = db.execute(
+                text(f"SELECT {', '.join(self.columns)} FROM {self.table} WHERE id = ANY(:ids)"),
+                {"ids": missing}
+            ).mappings().fetchall()
+
+            expires_at = time.monotonic() + self.ttl
+            with self._lock:
+                for row in rows:
+                    row = dict(row)
+                    found[row["id"]] = row
+                    self._entries[row["id"]] = (expires_at, row)
+                    self._entries.move_to_end(row["id"])
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return found
+
+    def get(self, db: Session, key: int):
+        return self.get_many(db, [key]).get(key)
+
+    def invalidate(self, ids=None):
+        """Drops the given ids, or every entry when ``ids`` is None."""
+        with self._lock:
+            if ids is None:
+                self._entries.clear()
+            else:
+                for key in ids:
+                    self._entries.pop(key, None)
+
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def size(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {"size": self.size(), "hits": self.hits, "misses": self.misses, "hit_ratio": self.hit_ratio()}
+
+
+customer_cache = LookupCache("customers", ["id", "name", "email", "phone"])
+product_cache = LookupCache("products", ["id", "name", "price"])
+
+
+def invalidate_lookup_caches(customer_ids=None, product_ids=None, everything: bool = False):
+    """Invalidation hook for changes to customers or products made by other services."""
+    if everything or customer_ids:
+        customer_cache.invalidate(None if everything else customer_ids)
+    if everything or product_ids:
+        product_cache.invalidate(None if everything else product_ids)
+
+
+def register_lookup_cache_metrics(aggregator: MetricsAggregator = metrics_aggregator):
+    """Exports hit ratio and size of both caches with every metrics flush."""
+    for name, cache in (("customers", customer_cache), ("products", product_cache)):
+        dimensions = (("Cache", name), ("Environment", ENVIRONMENT))
+        aggregator.register_gauge("LookupCacheHitRatio", cache.hit_ratio, "None", dimensions)
+        aggregator.register_gauge("LookupCacheSize", cache.size, "Count", dimensions)
@@ -0,0 +1,314 @@
+# app/utils/metrics_aggregator.py
+import asyncio
+import logging
+import math
+import os
+import threading
+from collections import deque
+
+from app.config import (
+    ENVIRONMENT,
+    METRICS_FLUSH_INTERVAL,
+    METRICS_BATCH_SIZE,
+    METRICS_BATCH_MAX_BYTES,
+    METRICS_MAX_SERIES,
+    METRICS_MAX_PENDING_BATCHES,
+)
+
+# Configure logger
+logger = logging.getLogger("sales_notes_service")
+
+SERVICE_NAME = "sales-notes-service"
+
+# CloudWatch accepts at most this many distinct values per datum
+MAX_HISTOGRAM_VALUES = 150
+
+
+def _encoded_size(value, prefix: str = "MetricData.member.1000"):
+    """
+    Upper bound on the bytes a datum adds to a PutMetricData request, counted as the
+    query-protocol parameters it flattens into (the most verbose encoding boto3 uses).
+    """
+    if isinstance(value, dict):
+        return sum(_encoded_size(item, f"{prefix}.{key}") for key, item in value.items())
+    if isinstance(value, list):
+        return sum(_encoded_size(item, f"{prefix}.member.{index}") for index, item in enumerate(value, 1))
+    return len(prefix) + len(str(value)) + 2
+
+
+def _bucket(value: float):
+    """Rounds a latency to two significant digits so similar values share a histogram bucket."""
+    if value <= 0:
+        return 0.0
+    digits = 1 - int(math.floor(math.log10(value)))
+    return round(value, digits)
+
+
+class MetricsExporter:
+    """Sends one batch of CloudWatch-style metric data. Implementations may block."""
+
+    def export(self, namespace: str, metric_data: list):
+        raise NotImplementedError
+
+
+class CloudWatchExporter(MetricsExporter):
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client('cloudwatch',
+                region_name=os.getenv("AWS_REGION"),
+                aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+                aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY")
+            )
+        return self._client
+
+    def export(self, namespace: str, metric_data: list):
+        self.client.put_metric_data(Namespace=namespace, MetricData=metric_data)
+
+
+class LoggingExporter(MetricsExporter):
+    """Logs aggregated metrics instead of publishing them; used outside production."""
+
+    def export(self, namespace: str, metric_data: list):
+        for datum in metric_data:
+            dimensions = ", ".join(f"{d['Name']}={d['Value']}" for d in datum.get('Dimensions', []))
+            if 'StatisticValues' in datum:
+                stats = datum['StatisticValues']
+                value = f"Count={stats['SampleCount']:.0f}, Sum={stats['Sum']:.2f}, Min={stats['Minimum']:.2f}, Max={stats['Maximum']:.2f}"
+            elif 'Values' in datum:
+                value = f"Count={sum(datum['Counts']):.0f}, Buckets={len(datum['Values'])}"
+            else:
+                value = f"Value={datum['Value']}"
+            logger.info(f"[DEV] {datum['MetricName']}: {dimensions}, {value}")
+
+
+class InMemoryExporter(MetricsExporter):
+    """Keeps exported batches in memory so metrics can be inspected locally."""
+
+    def __init__(self):
+        self.batches = []
+
+    def export(self, namespace: str, metric_data: list):
+        self.batches.append((namespace, list(metric_data)))
+
+
+class MetricsAggregator:
+    """
+    Aggregates request metrics in process and exports them periodically.
+
+    Requests only update in-memory counters. A background task drains them every
+    ``flush_interval`` seconds into statistic sets and latency histograms, splits
+    the data into batches of at most ``batch_size`` datums and ``max_batch_bytes``
+    estimated request bytes, and hands them to the exporter on a worker thread.
+    Series beyond ``max_series`` and batches beyond ``max_pending_batches`` (when
+    the exporter falls behind or fails) are dropped and counted; every flush
+    exports the drops since the previous one as DroppedSeries (observations)
+    and DroppedDatums.
+    """
+
+    def __init__(self, exporter: MetricsExporter, environment: str = ENVIRONMENT,
+                 flush_interval: float = METRICS_FLUSH_INTERVAL, batch_size: int = METRICS_BATCH_SIZE,
+                 max_series: int = METRICS_MAX_SERIES, max_pending_batches: int = METRICS_MAX_PENDING_BATCHES,
+                 max_batch_bytes: int = METRICS_BATCH_MAX_BYTES):
+        self.exporter = exporter
+        self.environment = environment
+        self.namespace = f"{SERVICE_NAME}/{environment}"
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_batch_bytes = max_batch_bytes
+        self.max_series = max_series
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._series = {}
+        self._gauges = {}
+        self._pending = deque()
+        self._max_pending_batches = max_pending_batches
+        self._task = None
+
+        self.dropped_series = 0
+        self.dropped_datums = 0
+        self._reported_drops = (0, 0)  # (series, datums) already exported
+
+    def _series_for(self, key):
+        series = self._series.get(key)
+        if series is None:
+            if len(self._series) >= self.max_series:
+                self.dropped_series += 1
+                return None
+            series = {"stats": None, "histogram": {}}
+            self._series[key] = series
+        return series
+
+    def record_value(self, metric_name: str, value: float, unit: str = "None", dimensions: tuple = (), histogram: bool = False):
+        """
+        Adds one observation to the series identified by name, unit and dimensions.
+        ``dimensions`` is a tuple of (name, value) pairs. Histogram series keep bucketed
+        values so percentiles can be computed downstream.
+        """
+        key = (metric_name, unit, tuple(dimensions), histogram)
+        with self._lock:
+            series = self._series_for(key)
+            if series is None:
+                return
+            if histogram:
+                bucket = _bucket(value)
+                series["histogram"][bucket] = series["histogram"].get(bucket, 0) + 1
+            elif series["stats"] is None:
+                series["stats"] = [1, value, value, value]
+            else:
+                stats = series["stats"]
+                stats[0] += 1
+                stats[1] += value
+                stats[2] = min(stats[2], value)
+                stats[3] = max(stats[3], value)
+
+    def record_request(self, path: str, method: str, status_code: int, execution_time: float):
+        dimensions = (("Path", path), ("Method", method), ("Environment", self.environment))
+        self.record_value("HealthCheck", 1 if status_code < 500 else 0, "Count", dimensions)  # 1 indicates success
+        self.record_value("ExecutionTime", execution_time, "Milliseconds", dimensions, histogram=True)
+        self.record_value(
+            "Requests", 1, "Count",
+            (("Path", path), ("Method", method), ("StatusCode", str(status_code)), ("Environment", self.environment))
+        )
+
+    def record_db_usage(self, path: str, method: str, query_count: int, db_time: float):
+        dimensions = (("Path", path), ("Method", method), ("Environment", self.environment))
+        self.record_value("DBQueries", query_count, "Count", dimensions)
+        self.record_value("DBTime", db_time, "Milliseconds", dimensions, histogram=True)
+
+    def register_gauge(self, metric_name: str, read, unit: str = "None", dimensions: tuple = ()):
+        """Registers a callable sampled once per flush and exported as a single value."""
+        self._gauges[(metric_name, tuple(dimensions))] = (read, unit)
+
+    def _drain(self):
+        with self._lock:
+            series, self._series = self._series, {}
+            drops = (self.dropped_series, self.dropped_datums)
+
+        metric_data = []
+        for (metric_name, unit, dimensions, histogram), values in series.items():
+            base = {
+                'MetricName': metric_name,
+                'Dimensions': [{'Name': name, 'Value': value} for name, value in dimensions],
+                'Unit': unit
+            }
+            if histogram:
+                buckets = sorted(values["histogram"].items())
+                for start in range(0, len(buckets), MAX_HISTOGRAM_VALUES):
+                    chunk = buckets[start:start + MAX_HISTOGRAM_VALUES]
+                    metric_data.append({**base, 'Values': [v for v, _ in chunk], 'Counts': [float(c) for _, c in chunk]})
+            else:
+                count, total, minimum, maximum = values["stats"]
+                metric_data.append({**base, 'StatisticValues': {
+                    'SampleCount': float(count), 'Sum': total, 'Minimum': minimum, 'Maximum': maximum
+                }})
+
+        for (metric_name, dimensions), (read, unit) in list(self._gauges.items()):
+            try:
+                gauge_value = float(read())
+            except Exception as e:
+                logger.error(f"Failed to read gauge {metric_name}: {str(e)}")
+                continue
+            metric_data.append({
+                'MetricName': metric_name,
+                'Dimensions': [{'Name': name, 'Value': value} for name, value in dimensions],
+                'Value': gauge_value,
+                'Unit': unit
+            })
+
+        dropped_series, dropped_datums = (now - before for now, before in zip(drops, self._reported_drops))
+        self._reported_drops = drops
+        if dropped_series or dropped_datums:
+            logger.warning(
+                f"Metrics dropped since the last flush: {dropped_series} observations beyond the series limit, "
+                f"{dropped_datums} unexported datums"
+            )
+        for metric_name, dropped in (("DroppedSeries", dropped_series), ("DroppedDatums", dropped_datums)):
+            metric_data.append({
+                'MetricName': metric_name,
+                'Dimensions': [{'Name': 'Environment', 'Value': self.environment}],
+                'Value': float(dropped),
+                'Unit': 'Count'
+            })
+        return metric_data
+
+    def _batches(self, metric_data: list):
+        """Splits datums into batches within both the datum count and the request size limits."""
+        batch, batch_bytes = [], 0
+        for datum in metric_data:
+            size = _encoded_size(datum)
+            if batch and (len(batch) >= self.batch_size or batch_bytes + size > self.max_batch_bytes):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(datum)
+            batch_bytes += size
+        if batch:
+            yield batch
+
+    def flush(self):
+        """Drains aggregated metrics and exports all pending batches. Blocking."""
+        with self._flush_lock:
+            metric_data = self._drain()
+            for batch in self._batches(metric_data):
+                if len(self._pending) >= self._max_pending_batches:
+                    dropped = self._pending.popleft()
+                    with self._lock:
+                        self.dropped_datums += len(dropped)
+                self._pending.append(batch)
+
+            while self._pending:
+                batch = self._pending[0]
+                try:
+                    self.exporter.export(self.namespace, batch)
+                except Exception as e:
+                    # Keep the batch for the next flush; the buffer bound limits how much is retained
+                    logger.error(f"Failed to publish metrics: {str(e)}")
+                    break
+                self._pending.popleft()
+
+    def stats(self):
+        with self._lock:
+            series = len(self._series)
+        return {
+            "series": series,
+            "pending_batches": len(self._pending),
+            "dropped_series": self.dropped_series,
+            "dropped_datums": self.dropped_datums
+        }
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                logger.error(f"Metrics flush failed: {str(e)}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+
+def build_exporter(environment: str = ENVIRONMENT):
+    if environment == "production":
+        return CloudWatchExporter()
+    logger.info("Running in development mode. CloudWatch metrics disabled.")
+    return LoggingExporter()
+
+
+metrics_aggregator = MetricsAggregator(build_exporter())
@@ -0,0 +1,25 @@
+# app/utils/pagination.py
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(value, sales_note_id: int):
+    """
+    Encodes the (sort value, id) position of the last row of a page as an opaque token.
+    The listing sorts by created_at; searches may sort by other dates or by amount.
+    """
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([value, sales_note_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, value_type=datetime.fromisoformat):
+    """Returns the (sort value, id) position encoded in a cursor. Raises ValueError for malformed tokens."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, sales_note_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return value_type(value), int(sales_note_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
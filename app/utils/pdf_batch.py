@@ -0,0 +1,218 @@
+# app/utils/pdf_batch.py
+import hashlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import select, update, bindparam, func
+from sqlalchemy.orm import Session
+
+from app.config import PDF_WORKERS
+from app.models.sales_note import SalesNote, SalesNoteItem
+from app.utils.lookup_cache import customer_cache, product_cache
+from app.utils.pdf_cache import PDFCache
+from app.utils.pdf_generator import PDFGenerator
+
+# Upper bound on the notes handed to a worker at once, so progress stays balanced across the pool
+MAX_CHUNK_SIZE = 200
+
+
+def render_chunk(documents: list):
+    """
+    Renders a chunk of documents to per-note files through the PDF cache.
+    Runs in a worker process; returns (sales_note_id, pdf_path, reused) tuples.
+    """
+    results = []
+    for data in documents:
+        sales_note_id = data["note"]["id"]
+        fingerprint = PDFGenerator.fingerprint(data)
+        pdf_path = PDFCache.lookup(sales_note_id, fingerprint)
+        reused = pdf_path is not None
+        if not reused:
+            pdf_path = PDFCache.store(
+                sales_note_id, fingerprint, lambda path, data=data: PDFGenerator.render(data, path), evict=False
+            )
+        results.append((sales_note_id, pdf_path, reused))
+    return results
+
+
+def _chunks(documents: list, workers: int):
+    size = max(1, min(MAX_CHUNK_SIZE, -(-len(documents) // (workers * 4))))
+    return [documents[start:start + size] for start in range(0, len(documents), size)]
+
+
+class PDFBatchRenderer:
+    """Renders many sales notes at once, loading their data with a handful of set-based queries."""
+
+    @staticmethod
+    def _select_notes(query, sales_note_ids: list = None, customer_id: int = None,
+                      date_from: datetime = None, date_to: datetime = None):
+        notes = SalesNote.__table__
+        if sales_note_ids:
+            query = query.where(notes.c.id.in_(sales_note_ids))
+        if customer_id is not None:
+            query = query.where(notes.c.customer_id == customer_id)
+        if date_from is not None:
+            query = query.where(notes.c.note_date >= date_from)
+        if date_to is not None:
+            query = query.where(notes.c.note_date < date_to)
+        return query
+
+    @staticmethod
+    def count_notes(db: Session, sales_note_ids: list = None, customer_id: int = None,
+                    date_from: datetime = None, date_to: datetime = None, max_notes: int = None):
+        """Counts the notes a batch selects, stopping past ``max_notes``; raises ValueError when there are more."""
+        matching = PDFBatchRenderer._select_notes(
+            select(SalesNote.__table__.c.id), sales_note_ids, customer_id, date_from, date_to
+        )
+        if max_notes is not None:
+            matching = matching.limit(max_notes + 1)
+        count = db.execute(select(func.count()).select_from(matching.subquery())).scalar()
+        if max_notes is not None and count > max_notes:
+            raise ValueError(f"A batch may contain at most {max_notes} sales notes")
+        return count
+
+    @staticmethod
+    def load_documents(db: Session, sales_note_ids: list = None, customer_id: int = None,
+                       date_from: datetime = None, date_to: datetime = None, max_notes: int = None):
+        """
+        Loads the document data of every matching note with one query for the notes, one for
+        their items and batched lookups for customers and products. Raises ValueError when
+        more than ``max_notes`` notes match. Notes whose customer or products no longer
+        exist are skipped.
+        """
+        notes = SalesNote.__table__
+        items = SalesNoteItem.__table__
+
+        query = PDFBatchRenderer._select_notes(select(notes), sales_note_ids, customer_id, date_from, date_to)
+        query = query.order_by(notes.c.note_date, notes.c.id)
+        if max_notes is not None:
+            query = query.limit(max_notes + 1)
+        note_rows = db.execute(query).fetchall()
+        if max_notes is not None and len(note_rows) > max_notes:
+            raise ValueError(f"A batch may contain at most {max_notes} sales notes")
+        if not note_rows:
+            return []
+
+        items_by_note = {}
+        item_rows = db.execute(
+            select(items).where(items.c.sales_note_id.in_([row.id for row in note_rows])).order_by(items.c.id)
+        ).fetchall()
+        for item in item_rows:
+            items_by_note.setdefault(item.sales_note_id, []).append(item)
+
+        customers = customer_cache.get_many(db, {row.customer_id for row in note_rows})
+        products = product_cache.get_many(db, {item.product_id for item in item_rows})
+
+        documents = []
+        for row in note_rows:
+            note_items = items_by_note.get(row.id, [])
+            if row.customer_id not in customers or any(item.product_id not in products for item in note_items):
+                continue
+            documents.append(PDFGenerator.build_document_data(row, note_items, customers[row.customer_id], products))
+        return documents
+
+    @staticmethod
+    def render_files(documents: list, workers: int = PDF_WORKERS, executor=None):
+        """
+        Renders one file per note, spreading chunks over ``executor`` or a process pool of its
+        own (or in process with ``workers`` <= 1). Returns (sales_note_id, pdf_path, reused)
+        tuples in input order.
+        """
+        if executor is not None:
+            results = [result for chunk in executor.map(render_chunk, _chunks(documents, workers)) for result in chunk]
+        elif workers <= 1 or len(documents) <= MAX_CHUNK_SIZE // 4:
+            results = render_chunk(documents)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                results = [result for chunk in pool.map(render_chunk, _chunks(documents, workers)) for result in chunk]
+        PDFCache.evict()
+        return results
+
+    @staticmethod
+    def render_merged(documents: list, output_path: str = None):
+        """
+        Renders all documents into a single PDF. fpdf cannot combine existing PDFs, so the
+        merged document is laid out in one process. Without ``output_path`` the file is
+        stored next to the per-note PDFs under a name derived from the notes' fingerprints.
+        """
+        if output_path is None:
+            digest = hashlib.sha256("".join(PDFGenerator.fingerprint(data) for data in documents).encode("utf-8"))
+            output_path = os.path.join(PDFCache.storage_dir(), f"sales_notes_batch_{digest.hexdigest()[:32]}.pdf")
+            if os.path.exists(output_path):
+                return output_path
+
+        tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        try:
+            PDFGenerator.render_merged(documents, tmp_path)
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return output_path
+
+    @staticmethod
+    def record_paths(db: Session, documents: list, results: list):
+        """
+        Records the rendered paths with one executemany. A note edited while the batch ran
+        no longer prints what was rendered, so its row (whose pdf_path the edit cleared) is
+        left alone.
+        """
+        notes = SalesNote.__table__
+        printed = {data["note"]["id"]: data["note"] for data in documents}
+        db.execute(
+            update(notes)
+            .where(
+                notes.c.id == bindparam("note_id"),
+                notes.c.status == bindparam("printed_status"),
+                notes.c.total_amount == bindparam("printed_total_amount"),
+                notes.c.tax_amount == bindparam("printed_tax_amount")
+            )
+            .values(pdf_path=bindparam("path")),
+            [
+                {
+                    "note_id": sales_note_id,
+                    "path": pdf_path,
+                    "printed_status": printed[sales_note_id]["status"],
+                    "printed_total_amount": printed[sales_note_id]["total_amount"],
+                    "printed_tax_amount": printed[sales_note_id]["tax_amount"],
+                }
+                for sales_note_id, pdf_path, _ in results
+            ]
+        )
+        db.commit()
+
+    @staticmethod
+    def render(db: Session, sales_note_ids: list = None, customer_id: int = None, date_from: datetime = None,
+               date_to: datetime = None, merge: bool = False, output_path: str = None, workers: int = PDF_WORKERS,
+               max_notes: int = None, executor=None):
+        """
+        Loads, renders and reports on a batch of sales notes. With ``executor`` (a process
+        pool) all rendering, including a merged document, runs there instead of in the caller.
+        """
+        start_time = time.perf_counter()
+        documents = PDFBatchRenderer.load_documents(db, sales_note_ids, customer_id, date_from, date_to, max_notes)
+        # Ending the read transaction returns the connection to the pool while the documents render
+        db.commit()
+
+        report = {"notes": len(documents)}
+        if merge:
+            if not documents:
+                report["pdf_path"] = None
+            elif executor is not None:
+                report["pdf_path"] = executor.submit(PDFBatchRenderer.render_merged, documents, output_path).result()
+            else:
+                report["pdf_path"] = PDFBatchRenderer.render_merged(documents, output_path)
+        else:
+            results = PDFBatchRenderer.render_files(documents, workers, executor)
+            if results:
+                PDFBatchRenderer.record_paths(db, documents, results)
+            report["rendered"] = sum(1 for _, _, reused in results if not reused)
+            report["reused"] = len(results) - report["rendered"]
+            report["files"] = [{"sales_note_id": sales_note_id, "pdf_path": pdf_path} for sales_note_id, pdf_path, _ in results]
+
+        report["seconds"] = round(time.perf_counter() - start_time, 3)
+        report["notes_per_sec"] = round(len(documents) / report["seconds"], 1) if report["seconds"] else None
+        return report
@@ -0,0 +1,86 @@
+# app/utils/pdf_cache.py
+import os
+import re
+import threading
+
+from app.config import PDF_STORAGE_PATH, PDF_CACHE_MAX_BYTES
+from app.utils.storage import pdf_storage, shard_prefix
+
+
+class PDFCache:
+    """
+    Content-addressed store for rendered sales note PDFs.
+
+    Files are named after the sales note id and the fingerprint of everything printed
+    in the document, so an unchanged note always maps to the same file. Files live in
+    the configured storage backend, which hands back a location (stored as pdf_path)
+    for every key. Hits refresh the file's recency and the least recently used files
+    are evicted once the store exceeds PDF_CACHE_MAX_BYTES, as far as the backend
+    supports it. Counters are per process.
+    """
+    _lock = threading.Lock()
+    _counters = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def storage_dir():
+        """Local directory for working files such as merged batch output (and the local backend's shards)."""
+        os.makedirs(PDF_STORAGE_PATH, exist_ok=True)
+        return PDF_STORAGE_PATH
+
+    @staticmethod
+    def key_for(sales_note_id: int, fingerprint: str):
+        return f"{shard_prefix(sales_note_id)}/sales_note_{sales_note_id}_{fingerprint[:32]}.pdf"
+
+    @staticmethod
+    def fingerprint_of(pdf_path: str):
+        """Returns the fingerprint prefix encoded in a stored file name, or None for other files."""
+        match = re.fullmatch(r"sales_note_\d+_([0-9a-f]{32})\.pdf", os.path.basename(pdf_path))
+        return match.group(1) if match else None
+
+    @classmethod
+    def _count(cls, counter: str, amount: int = 1):
+        with cls._lock:
+            cls._counters[counter] += amount
+
+    @classmethod
+    def lookup(cls, sales_note_id: int, fingerprint: str):
+        """Returns the location of the stored PDF for this fingerprint, or None if it has to be rendered."""
+        key = cls.key_for(sales_note_id, fingerprint)
+        if not pdf_storage.touch(key):
+            cls._count("misses")
+            return None
+        cls._count("hits")
+        return pdf_storage.location(key)
+
+    @classmethod
+    def store(cls, sales_note_id: int, fingerprint: str, write, evict: bool = True):
+        """
+        Stores a render produced by ``write(path)`` and returns its location. Batch writers
+        pass ``evict=False`` and call ``evict()`` once at the end instead of after every file.
+        """
+        key = cls.key_for(sales_note_id, fingerprint)
+        location = pdf_storage.write(key, write)
+        if evict:
+            cls.evict(keep=key)
+        return location
+
+    @classmethod
+    def evict(cls, keep: str = None):
+        """Removes least recently used PDFs until the store fits the size budget."""
+        cls._count("evictions", pdf_storage.evict(PDF_CACHE_MAX_BYTES, keep=keep))
+
+    @classmethod
+    def invalidate(cls, sales_note_id: int):
+        """Removes every stored render of a sales note."""
+        for key in pdf_storage.keys_with_prefix(f"{shard_prefix(sales_note_id)}/sales_note_{sales_note_id}_"):
+            if pdf_storage.delete(key):
+                cls._count("invalidations")
+
+    @classmethod
+    def stats(cls):
+        with cls._lock:
+            counters = dict(cls._counters)
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_ratio"] = counters["hits"] / lookups if lookups else 0.0
+        counters["backend"] = pdf_storage.name
+        return counters
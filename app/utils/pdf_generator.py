@@ -1,37 +1,112 @@
 # app/utils/pdf_generator.py
-import os
-from datetime import datetime
-from fpdf import FPDF
-from sqlalchemy.orm import Session
+import hashlib
 import json
+from typing import TYPE_CHECKING
+from sqlalchemy.orm import Session
 
 from app.models.sales_note import SalesNote, SalesNoteItem
+from app.utils.pdf_cache import PDFCache
+from app.utils.lookup_cache import customer_cache, product_cache
+
+if TYPE_CHECKING:
+    from fpdf import FPDF
+
+# Bump whenever the layout below changes so existing renders are not reused
+LAYOUT_VERSION = 1
 
 class PDFGenerator:
     @staticmethod
-    def generate_sales_note_pdf(db: Session, sales_note_id: int):
+    def load_document_data(db: Session, sales_note_id: int):
         """
-        Generates a PDF for a sales note and saves it to the configured storage path.
-        Returns the path to the generated PDF.
+        Loads everything printed on a sales note PDF into a plain dict.
+        The dict is the only input to rendering, which makes it the basis of the fingerprint.
         """
         # Get the sales note and its items
         sales_note = db.query(SalesNote).filter(SalesNote.id == sales_note_id).first()
         if not sales_note:
             raise ValueError(f"Sales note with ID {sales_note_id} not found")
 
-        items = db.query(SalesNoteItem).filter(SalesNoteItem.sales_note_id == sales_note_id).all()
+        items = (
+            db.query(SalesNoteItem)
+            .filter(SalesNoteItem.sales_note_id == sales_note_id)
+            .order_by(SalesNoteItem.id)
+            .all()
+        )
+
+        # Get customer and product information from the shared lookup caches
+        customer = customer_cache.get(db, sales_note.customer_id)
+        products = product_cache.get_many(db, [item.product_id for item in items])
+
+        return PDFGenerator.build_document_data(sales_note, items, customer, products)
+
+    @staticmethod
+    def build_document_data(sales_note, items, customer: dict, products: dict):
+        """Builds the document dict from a note and its items (ORM objects or rows) and the cached reference data."""
+        return {
+            "note": {
+                "id": sales_note.id,
+                "note_number": sales_note.note_number,
+                "note_date": sales_note.note_date.strftime('%Y-%m-%d'),
+                "status": sales_note.status,
+                "total_amount": sales_note.total_amount,
+                "tax_amount": sales_note.tax_amount
+            },
+            "customer": {
+                "name": customer['name'],
+                "email": customer['email'],
+                "phone": customer['phone']
+            },
+            "items": [
+                {
+                    "product_name": products[item.product_id]['name'],
+                    "quantity": item.quantity,
+                    "unit_price": item.unit_price,
+                    "subtotal": item.subtotal
+                }
+                for item in items
+            ]
+        }
+
+    @staticmethod
+    def fingerprint(data: dict):
+        """Returns a stable hash of the document data and layout version."""
+        payload = json.dumps({"layout": LAYOUT_VERSION, "data": data}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def new_document():
+        """Returns an empty FPDF document; fpdf (and the fonttools/Pillow stack behind it) is imported on first use."""
+        from fpdf import FPDF
+        return FPDF()
+
+    @staticmethod
+    def render(data: dict, pdf_path: str):
+        """Lays out the document described by ``data`` and writes it to ``pdf_path``."""
+        pdf = PDFGenerator.new_document()
+        PDFGenerator.layout(pdf, data)
+        pdf.output(pdf_path)
+
+    @staticmethod
+    def render_bytes(data: dict):
+        """Lays out the document described by ``data`` and returns the PDF in memory."""
+        pdf = PDFGenerator.new_document()
+        PDFGenerator.layout(pdf, data)
+        return bytes(pdf.output())
 
-        # Get customer information
-        customer = db.execute(f"SELECT * FROM customers WHERE id = {sales_note.customer_id}").fetchone()
+    @staticmethod
+    def render_merged(documents: list, pdf_path: str):
+        """Lays out many documents, one after another, into a single PDF."""
+        pdf = PDFGenerator.new_document()
+        for data in documents:
+            PDFGenerator.layout(pdf, data)
+        pdf.output(pdf_path)
 
-        # Get product information for each item
-        products = {}
-        for item in items:
-            product = db.execute(f"SELECT * FROM products WHERE id = {item.product_id}").fetchone()
-            products[item.product_id] = product
+    @staticmethod
+    def layout(pdf: "FPDF", data: dict):
+        """Adds the page(s) for the document described by ``data`` to ``pdf``."""
+        note = data["note"]
+        customer = data["customer"]
 
-        # Create PDF
-        pdf = FPDF()
         pdf.add_page()
 
         # Set up font
@@ -39,13 +114,13 @@ class PDFGenerator:
 
         # Title
         pdf.cell(190, 10, "SALES NOTE", 0, 1, "C")
-        pdf.cell(190, 10, f"#{sales_note.note_number}", 0, 1, "C")
+        pdf.cell(190, 10, f"#{note['note_number']}", 0, 1, "C")
         pdf.ln(10)
 
         # Date and Status
         pdf.set_font("Arial", "", 10)
-        pdf.cell(95, 10, f"Date: {sales_note.note_date.strftime('%Y-%m-%d')}", 0, 0)
-        pdf.cell(95, 10, f"Status: {sales_note.status.upper()}", 0, 1, "R")
+        pdf.cell(95, 10, f"Date: {note['note_date']}", 0, 0)
+        pdf.cell(95, 10, f"Status: {note['status'].upper()}", 0, 1, "R")
         pdf.ln(5)
 
         # Customer Information
@@ -70,36 +145,45 @@ class PDFGenerator:
 
         # Table Content
         pdf.set_font("Arial", "", 10)
-        for item in items:
-            product = products[item.product_id]
-            pdf.cell(80, 10, product['name'], 1, 0)
-            pdf.cell(30, 10, str(item.quantity), 1, 0, "C")
-            pdf.cell(40, 10, f"${item.unit_price:.2f}", 1, 0, "R")
-            pdf.cell(40, 10, f"${item.subtotal:.2f}", 1, 1, "R")
+        for item in data["items"]:
+            pdf.cell(80, 10, item['product_name'], 1, 0)
+            pdf.cell(30, 10, str(item['quantity']), 1, 0, "C")
+            pdf.cell(40, 10, f"${item['unit_price']:.2f}", 1, 0, "R")
+            pdf.cell(40, 10, f"${item['subtotal']:.2f}", 1, 1, "R")
 
         # Totals
         pdf.ln(5)
         pdf.set_font("Arial", "B", 10)
         pdf.cell(150, 10, "Subtotal:", 0, 0, "R")
-        pdf.cell(40, 10, f"${sales_note.total_amount - sales_note.tax_amount:.2f}", 0, 1, "R")
+        pdf.cell(40, 10, f"${note['total_amount'] - note['tax_amount']:.2f}", 0, 1, "R")
         pdf.cell(150, 10, "Tax:", 0, 0, "R")
-        pdf.cell(40, 10, f"${sales_note.tax_amount:.2f}", 0, 1, "R")
+        pdf.cell(40, 10, f"${note['tax_amount']:.2f}", 0, 1, "R")
         pdf.set_font("Arial", "B", 12)
         pdf.cell(150, 10, "Total:", 0, 0, "R")
-        pdf.cell(40, 10, f"${sales_note.total_amount:.2f}", 0, 1, "R")
+        pdf.cell(40, 10, f"${note['total_amount']:.2f}", 0, 1, "R")
+
+    @staticmethod
+    def cached_pdf_path(db: Session, sales_note_id: int):
+        """Returns the stored PDF for the note's current content, or None if it needs rendering."""
+        data = PDFGenerator.load_document_data(db, sales_note_id)
+        return PDFCache.lookup(sales_note_id, PDFGenerator.fingerprint(data))
 
-        # Create directory if it doesn't exist
-        pdf_dir = os.getenv("PDF_STORAGE_PATH", "/tmp/sales_notes_pdfs")
-        os.makedirs(pdf_dir, exist_ok=True)
+    @staticmethod
+    def generate_sales_note_pdf(db: Session, sales_note_id: int):
+        """
+        Generates a PDF for a sales note and saves it to the configured storage path.
+        An existing render with the same fingerprint is reused instead of rendering again.
+        Returns the path to the generated PDF.
+        """
+        data = PDFGenerator.load_document_data(db, sales_note_id)
+        fingerprint = PDFGenerator.fingerprint(data)
 
-        # Save PDF
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        pdf_filename = f"sales_note_{sales_note.id}_{timestamp}.pdf"
-        pdf_path = os.path.join(pdf_dir, pdf_filename)
-        pdf.output(pdf_path)
+        pdf_path = PDFCache.lookup(sales_note_id, fingerprint)
+        if pdf_path is None:
+            pdf_path = PDFCache.store(sales_note_id, fingerprint, lambda path: PDFGenerator.render(data, path))
 
         # Update sales note with PDF path
-        sales_note.pdf_path = pdf_path
+        db.query(SalesNote).filter(SalesNote.id == sales_note_id).update({SalesNote.pdf_path: pdf_path})
         db.commit()
 
         return pdf_path
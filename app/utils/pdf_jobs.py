@@ -0,0 +1,199 @@
+# app/utils/pdf_jobs.py
+import logging
+import multiprocessing
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from datetime import timedelta
+
+from sqlalchemy import text, or_, and_, func, bindparam
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session
+
+from app.config import PDF_WORKERS, PDF_JOB_LEASE_SECONDS
+from app.database import SessionLocal
+from app.models.pdf_job import PdfJob
+from app.schemas.sales_note import PdfBatchRequest
+from app.utils.pdf_batch import PDFBatchRenderer
+from app.utils.pdf_generator import PDFGenerator
+
+logger = logging.getLogger("sales_notes_service")
+
+# A running job whose updated_at is older than the lease belongs to a worker that died
+STALE_RUNNING = "status = 'running' AND updated_at < now() - make_interval(secs => :lease)"
+
+
+# Finished jobs keep their path and, for batches, the renderer's report
+FINISH_JOB = text(
+    "UPDATE pdf_jobs SET status = 'done', pdf_path = :pdf_path, result = :result, updated_at = now() WHERE id = :job_id"
+).bindparams(bindparam("result", type_=JSONB))
+
+
+def render_pdf_batch(db: Session, batch: dict):
+    """Renders a batch job's selection in this worker process and returns the report."""
+    selection = PdfBatchRequest.model_validate(batch)
+    return PDFBatchRenderer.render(
+        db,
+        sales_note_ids=selection.sales_note_ids,
+        customer_id=selection.customer_id,
+        date_from=selection.date_from,
+        date_to=selection.date_to,
+        merge=selection.merge,
+        workers=1
+    )
+
+
+def run_pdf_job(job_id: str):
+    """
+    Renders the PDF for a queued job, or every PDF of a batch job. Runs inside a worker
+    process and opens its own session, so no request-scoped session is held while the
+    documents are laid out.
+    """
+    db = SessionLocal()
+    try:
+        # Claim the job; another process may already have picked it up, unless its lease ran out
+        claimed = db.execute(
+            text("UPDATE pdf_jobs SET status = 'running', updated_at = now() "
+                 f"WHERE id = :job_id AND (status = 'queued' OR ({STALE_RUNNING})) RETURNING sales_note_id, batch"),
+            {"job_id": job_id, "lease": PDF_JOB_LEASE_SECONDS}
+        ).fetchone()
+        db.commit()
+        if not claimed:
+            return
+
+        try:
+            if claimed.batch is not None:
+                result = render_pdf_batch(db, claimed.batch)
+                pdf_path = result.get("pdf_path")
+            else:
+                result = None
+                pdf_path = PDFGenerator.generate_sales_note_pdf(db, claimed.sales_note_id)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"PDF job {job_id} failed: {str(e)}")
+            db.execute(
+                text("UPDATE pdf_jobs SET status = 'failed', error = :error, updated_at = now() WHERE id = :job_id"),
+                {"job_id": job_id, "error": str(e)}
+            )
+            db.commit()
+            return
+
+        db.execute(FINISH_JOB, {"job_id": job_id, "pdf_path": pdf_path, "result": result})
+        db.commit()
+    finally:
+        db.close()
+
+
+class PDFJobQueue:
+    _executor = None
+
+    @classmethod
+    def executor(cls):
+        if cls._executor is None:
+            # Spawned workers build their own engine instead of inheriting the parent's pooled connections
+            cls._executor = ProcessPoolExecutor(
+                max_workers=PDF_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return cls._executor
+
+    @classmethod
+    def submit(cls, job_id: str):
+        future = cls.executor().submit(run_pdf_job, job_id)
+        future.add_done_callback(lambda future: cls._on_done(job_id, future))
+
+    @classmethod
+    def _on_done(cls, job_id: str, future):
+        """
+        run_pdf_job records its own outcome, so an exception here means the worker never
+        finished (e.g. it was killed and the pool broke): fail the job instead of leaving
+        it running, and start a fresh pool for later jobs.
+        """
+        if future.cancelled() or future.exception() is None:
+            return
+        error = future.exception()
+        logger.error(f"PDF job {job_id} failed in the worker pool: {str(error)}")
+        if isinstance(error, BrokenProcessPool):
+            cls._executor = None
+        db = SessionLocal()
+        try:
+            db.execute(
+                text("UPDATE pdf_jobs SET status = 'failed', error = :error, updated_at = now() "
+                     "WHERE id = :job_id AND status IN ('queued', 'running')"),
+                {"job_id": job_id, "error": str(error) or type(error).__name__}
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    @classmethod
+    def enqueue(cls, db: Session, sales_note_id: int):
+        """
+        Queues a render for the sales note and returns the job.
+        A note that already has a pending job reuses it instead of queueing a duplicate render.
+        """
+        job = cls.pending_job(db, sales_note_id)
+        if job is not None:
+            return job
+
+        job = PdfJob(id=uuid.uuid4().hex, sales_note_id=sales_note_id, status="queued")
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        cls.submit(job.id)
+        return job
+
+    @classmethod
+    def enqueue_batch(cls, db: Session, batch: PdfBatchRequest):
+        """Queues a batch render (see PDFBatchRenderer) and returns the job; its report ends up in ``result``."""
+        job = PdfJob(id=uuid.uuid4().hex, batch=batch.model_dump(mode="json"), status="queued")
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        cls.submit(job.id)
+        return job
+
+    @staticmethod
+    def pending_job(db: Session, sales_note_id: int):
+        """The note's queued job, or its running job while the lease holds; abandoned jobs are not pending."""
+        lease_start = func.now() - timedelta(seconds=PDF_JOB_LEASE_SECONDS)
+        return (
+            db.query(PdfJob)
+            .filter(
+                PdfJob.sales_note_id == sales_note_id,
+                or_(PdfJob.status == "queued", and_(PdfJob.status == "running", PdfJob.updated_at >= lease_start))
+            )
+            .order_by(PdfJob.created_at.desc())
+            .first()
+        )
+
+    @classmethod
+    def resume_pending(cls):
+        """
+        Resubmits jobs that were queued but never claimed, and requeues running jobs whose
+        lease expired because their worker or the app died, e.g. after a restart.
+        """
+        db = SessionLocal()
+        try:
+            db.execute(
+                text(f"UPDATE pdf_jobs SET status = 'queued', updated_at = now() WHERE {STALE_RUNNING}"),
+                {"lease": PDF_JOB_LEASE_SECONDS}
+            )
+            db.commit()
+            job_ids = [row[0] for row in db.execute(text("SELECT id FROM pdf_jobs WHERE status = 'queued'"))]
+        finally:
+            db.close()
+
+        for job_id in job_ids:
+            cls.submit(job_id)
+        if job_ids:
+            logger.info(f"Resubmitted {len(job_ids)} pending PDF jobs")
+
+    @classmethod
+    def shutdown(cls):
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=True)
+            cls._executor = None
@@ -0,0 +1,160 @@
+# app/utils/sales_stats.py
+from datetime import date
+
+from sqlalchemy import func, select, delete, insert, cast, Date, text, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.sales_note import SalesNote
+from app.models.sales_note_archive import SalesNoteArchive
+from app.models.sales_note_stats import SalesNoteDailyStat
+
+
+class SalesNoteRollup:
+    """
+    Maintains sales_note_daily_stats. Write paths describe how a note moved between
+    (day, customer, status) buckets as deltas and apply them in the same transaction as
+    the note change, so the rollup commits or rolls back together with the notes.
+    """
+
+    @staticmethod
+    def delta(note, sign: int = 1):
+        """Returns the delta adding (sign=1) or removing (sign=-1) a note; works with ORM objects and rows."""
+        return (
+            note.note_date.date(),
+            note.customer_id,
+            note.status,
+            sign,
+            sign * note.total_amount,
+            sign * note.tax_amount
+        )
+
+    @staticmethod
+    def upsert_statement(deltas):
+        """
+        Folds deltas per bucket and returns one INSERT ... ON CONFLICT statement with its
+        parameters, or (None, None) when they cancel out.
+        """
+        buckets = {}
+        for day, customer_id, status, count, total, tax in deltas:
+            current = buckets.get((day, customer_id, status), (0, 0.0, 0.0))
+            buckets[(day, customer_id, status)] = (current[0] + count, current[1] + total, current[2] + tax)
+
+        rows = [
+            {"day": day, "customer_id": customer_id, "status": status,
+             "note_count": count, "total_amount": total, "tax_amount": tax}
+            for (day, customer_id, status), (count, total, tax) in buckets.items()
+            if count or total or tax
+        ]
+        if not rows:
+            return None, None
+
+        table = SalesNoteDailyStat.__table__
+        statement = pg_insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.day, table.c.customer_id, table.c.status],
+            set_={
+                "note_count": table.c.note_count + statement.excluded.note_count,
+                "total_amount": table.c.total_amount + statement.excluded.total_amount,
+                "tax_amount": table.c.tax_amount + statement.excluded.tax_amount,
+            }
+        )
+        # Sorted so concurrent writers lock bucket rows in the same order
+        return statement, sorted(rows, key=lambda row: (row["day"], row["customer_id"], row["status"]))
+
+    @staticmethod
+    def apply(db: Session, deltas):
+        statement, rows = SalesNoteRollup.upsert_statement(deltas)
+        if statement is not None:
+            db.execute(statement, rows)
+
+    @staticmethod
+    def rebuild(db: Session, date_from: date = None, date_to: date = None):
+        """
+        Recomputes the rollup from sales_notes and the archive, for every day or for
+        [date_from, date_to). Writers are held off for the duration so no delta is lost or
+        counted twice. Returns the number of bucket rows written.
+        """
+        table = SalesNoteDailyStat.__table__
+
+        db.execute(text("LOCK TABLE sales_note_daily_stats IN EXCLUSIVE MODE"))
+
+        days = []
+        if date_from is not None:
+            days.append(table.c.day >= date_from)
+        if date_to is not None:
+            days.append(table.c.day < date_to)
+
+        branches = []
+        for source_table in (SalesNote.__table__, SalesNoteArchive.__table__):
+            branch = select(
+                source_table.c.note_date, source_table.c.customer_id, source_table.c.status,
+                source_table.c.total_amount, source_table.c.tax_amount
+            )
+            # Bounded on each branch so the archive scan is limited to the partitions in range
+            if date_from is not None:
+                branch = branch.where(source_table.c.note_date >= date_from)
+            if date_to is not None:
+                branch = branch.where(source_table.c.note_date < date_to)
+            branches.append(branch)
+        notes = union_all(*branches).subquery()
+        day = cast(notes.c.note_date, Date)
+        source = select(
+            day, notes.c.customer_id, notes.c.status,
+            func.count(), func.sum(notes.c.total_amount), func.sum(notes.c.tax_amount)
+        ).group_by(day, notes.c.customer_id, notes.c.status)
+
+        db.execute(delete(table).where(*days))
+        db.execute(
+            insert(table).from_select(
+                ["day", "customer_id", "status", "note_count", "total_amount", "tax_amount"], source
+            )
+        )
+        rows = db.execute(select(func.count()).select_from(table).where(*days)).scalar()
+        db.commit()
+        return rows
+
+    @staticmethod
+    def query(db: Session, group_by: str, date_from: date = None, date_to: date = None,
+              customer_id: int = None, status: str = None):
+        """Returns (groups, totals) summed from the rollup; the cost depends on the buckets in range, not the notes."""
+        table = SalesNoteDailyStat.__table__
+        keys = {
+            "day": table.c.day,
+            "month": func.to_char(table.c.day, "YYYY-MM"),
+            "customer": table.c.customer_id,
+            "status": table.c.status,
+        }
+        key = keys[group_by].label("key")
+
+        query = select(
+            key,
+            func.sum(table.c.note_count).label("note_count"),
+            func.sum(table.c.total_amount).label("total_amount"),
+            func.sum(table.c.tax_amount).label("tax_amount")
+        )
+        if date_from is not None:
+            query = query.where(table.c.day >= date_from)
+        if date_to is not None:
+            query = query.where(table.c.day < date_to)
+        if customer_id is not None:
+            query = query.where(table.c.customer_id == customer_id)
+        if status is not None:
+            query = query.where(table.c.status == status)
+        query = query.group_by(key).having(func.sum(table.c.note_count) != 0).order_by(key)
+
+        groups = []
+        totals = {"note_count": 0, "total_amount": 0.0, "tax_amount": 0.0}
+        for row in db.execute(query):
+            group = {
+                "key": row.key.isoformat() if isinstance(row.key, date) else row.key,
+                "note_count": int(row.note_count),
+                "total_amount": round(row.total_amount, 2),
+                "tax_amount": round(row.tax_amount, 2)
+            }
+            groups.append(group)
+            for name in totals:
+                totals[name] += group[name]
+        totals["total_amount"] = round(totals["total_amount"], 2)
+        totals["tax_amount"] = round(totals["tax_amount"], 2)
+        return groups, totals
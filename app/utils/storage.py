@@ -0,0 +1,294 @@
+# app/utils/storage.py
+import glob
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+from app.config import (
+    PDF_STORAGE_BACKEND,
+    PDF_STORAGE_PATH,
+    PDF_S3_BUCKET,
+    PDF_S3_PREFIX,
+    PDF_S3_ENDPOINT_URL,
+    PDF_PRESIGNED_URL_TTL,
+)
+
+# Chunk size used when proxying stored files through the app
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def shard_prefix(sales_note_id: int):
+    """
+    Two levels of 256 directories picked by a hash of the note id. All renders of a note
+    share a shard, so they can be listed without scanning the whole store.
+    """
+    digest = hashlib.sha256(str(sales_note_id).encode("utf-8")).hexdigest()
+    return f"{digest[:2]}/{digest[2:4]}"
+
+
+class PDFStorage:
+    """
+    Stores rendered PDFs under relative keys. A key's location (what gets saved in
+    sales_notes.pdf_path) is backend specific; ``key_of`` maps it back.
+    """
+    name = None
+
+    def location(self, key: str):
+        raise NotImplementedError
+
+    def key_of(self, location: str):
+        """Returns the key for a location written by this backend, or None."""
+        raise NotImplementedError
+
+    def write(self, key: str, write):
+        """Stores the file produced by ``write(path)`` atomically and returns its location."""
+        raise NotImplementedError
+
+    def stat(self, key: str):
+        """Returns (size, modified timestamp), or None if the key does not exist."""
+        raise NotImplementedError
+
+    def touch(self, key: str):
+        """Marks a key as recently used; returns False if it does not exist."""
+        return self.stat(key) is not None
+
+    def keys_with_prefix(self, prefix: str):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def iter_bytes(self, key: str):
+        raise NotImplementedError
+
+    def local_path(self, key: str):
+        """Returns a filesystem path the key can be served from directly, if any."""
+        return None
+
+    def presigned_url(self, key: str, filename: str):
+        """Returns a temporary URL clients can download the key from, if supported."""
+        return None
+
+    def evict(self, max_bytes: int, keep: str = None):
+        """Removes least recently used keys beyond ``max_bytes``; returns how many were removed."""
+        return 0
+
+
+class LocalPDFStorage(PDFStorage):
+    """
+    Hash-sharded directory tree under ``root``. Files are written under a temporary name
+    and renamed into place so readers never see a partial PDF. Recency is tracked in
+    atime, leaving mtime as the render time.
+    """
+    name = "local"
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        self._lock = threading.Lock()
+        # Bytes in the store at the last eviction scan plus what this process wrote since
+        self._estimated_bytes = None
+
+    def location(self, key: str):
+        return os.path.join(self.root, key)
+
+    def key_of(self, location: str):
+        path = os.path.abspath(location)
+        if not path.startswith(self.root + os.sep):
+            return None
+        return os.path.relpath(path, self.root).replace(os.sep, "/")
+
+    def write(self, key: str, write):
+        path = self.location(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            write(tmp_path)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        with self._lock:
+            if self._estimated_bytes is not None:
+                self._estimated_bytes += size
+        return path
+
+    def stat(self, key: str):
+        try:
+            stat_result = os.stat(self.location(key))
+        except FileNotFoundError:
+            return None
+        return stat_result.st_size, stat_result.st_mtime
+
+    def touch(self, key: str):
+        path = self.location(key)
+        try:
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def keys_with_prefix(self, prefix: str):
+        return [
+            os.path.relpath(path, self.root).replace(os.sep, "/")
+            for path in glob.glob(glob.escape(self.location(prefix)) + "*.pdf")
+        ]
+
+    def delete(self, key: str):
+        try:
+            os.remove(self.location(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def iter_bytes(self, key: str):
+        with open(self.location(key), "rb") as pdf:
+            while True:
+                chunk = pdf.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+    def local_path(self, key: str):
+        return self.location(key)
+
+    def evict(self, max_bytes: int, keep: str = None):
+        if max_bytes <= 0:
+            return 0
+        with self._lock:
+            if self._estimated_bytes is not None and self._estimated_bytes <= max_bytes:
+                # Skip walking the tree while the store is known to fit the budget
+                return 0
+
+        entries = []
+        total = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if not name.endswith(".pdf"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat_result = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat_result.st_atime, stat_result.st_size, path))
+                total += stat_result.st_size
+
+        keep_path = self.location(keep) if keep else None
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= max_bytes:
+                break
+            if path == keep_path:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+        with self._lock:
+            self._estimated_bytes = total
+        return removed
+
+
+class S3PDFStorage(PDFStorage):
+    """
+    Stores PDFs in an S3-compatible bucket (AWS S3, MinIO, ...). Uploads are atomic on
+    the service side. Expiry of old renders is left to the bucket's lifecycle rules.
+    """
+    name = "s3"
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str = None, client=None):
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.endpoint_url = endpoint_url
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client('s3',
+                endpoint_url=self.endpoint_url,
+                region_name=os.getenv("AWS_REGION"),
+                aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
+                aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY")
+            )
+        return self._client
+
+    def _is_missing(self, error):
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def location(self, key: str):
+        return f"s3://{self.bucket}/{self.prefix}{key}"
+
+    def key_of(self, location: str):
+        base = f"s3://{self.bucket}/{self.prefix}"
+        return location[len(base):] if location.startswith(base) else None
+
+    def write(self, key: str, write):
+        # fpdf writes to a path, so render into a local temporary file and upload it
+        fd, tmp_path = tempfile.mkstemp(suffix=".pdf")
+        os.close(fd)
+        try:
+            write(tmp_path)
+            self.client.upload_file(
+                tmp_path, self.bucket, self.prefix + key, ExtraArgs={"ContentType": "application/pdf"}
+            )
+        finally:
+            os.remove(tmp_path)
+        return self.location(key)
+
+    def stat(self, key: str):
+        from botocore.exceptions import ClientError
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+        except ClientError as e:
+            if self._is_missing(e):
+                return None
+            raise
+        return head["ContentLength"], head["LastModified"].timestamp()
+
+    def keys_with_prefix(self, prefix: str):
+        keys = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix + prefix):
+            keys.extend(entry["Key"][len(self.prefix):] for entry in page.get("Contents", []))
+        return keys
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+        return True
+
+    def iter_bytes(self, key: str):
+        body = self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)["Body"]
+        try:
+            yield from body.iter_chunks(READ_CHUNK_SIZE)
+        finally:
+            body.close()
+
+    def presigned_url(self, key: str, filename: str):
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self.prefix + key,
+                "ResponseContentType": "application/pdf",
+                "ResponseContentDisposition": f'attachment; filename="{filename}"'
+            },
+            ExpiresIn=PDF_PRESIGNED_URL_TTL
+        )
+
+
+def build_storage():
+    if PDF_STORAGE_BACKEND == "s3":
+        return S3PDFStorage(PDF_S3_BUCKET, PDF_S3_PREFIX, PDF_S3_ENDPOINT_URL)
+    return LocalPDFStorage(PDF_STORAGE_PATH)
+
+
+pdf_storage = build_storage()
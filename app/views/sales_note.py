@@ -1,41 +1,278 @@
 # app/views/sales_note.py
-from fastapi import APIRouter, Depends, Query, Path, Body, HTTPException
+import os
+from fastapi import APIRouter, Depends, Query, Path, Body, Header, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from fastapi.responses import FileResponse
-import os
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from datetime import datetime, date
 
-from app.schemas.sales_note import SalesNoteCreate, SalesNoteUpdate, SalesNoteResponse
+from app.schemas.sales_note import SalesNoteCreate, SalesNoteUpdate, SalesNoteResponse, SalesNoteBulkResponse, PdfJobResponse, LookupCacheInvalidate, PdfBatchRequest, SalesNoteStatsResponse, SalesNoteStatusBulkRequest, SalesNoteStatusBulkResponse, SalesNoteChangesResponse
 from app.controllers.sales_note import SalesNoteController
-from app.database import get_db
+from app.database import get_db, get_read_db, choose_read_replica
+from app.config import BULK_MAX_NOTES, PDF_JOBS_ENABLED, PDF_BATCH_MAX_NOTES, PDF_BATCH_SYNC_MAX_NOTES, FAST_JSON_RESPONSES, CHANGE_FEED_BATCH_SIZE, CHANGE_FEED_MAX_WAIT
+from app.utils.pdf_cache import PDFCache
+from app.utils.pdf_generator import PDFGenerator
+from app.utils.http_cache import is_not_modified, not_modified_response, stored_pdf_response, pdf_bytes_response
+from app.utils.export import SalesNoteExporter
+from app.utils.lookup_cache import customer_cache, product_cache, invalidate_lookup_caches
+from app.utils.idempotency import MAX_KEY_LENGTH
+from app.utils.fast_json import FastJSONResponse
+from app.utils.change_feed import SalesNoteChangeFeed, UnknownChangePosition
+from app.middleware.profiling import ProfiledRoute
+
+router = APIRouter(prefix="/api/sales-notes", tags=["sales-notes"], route_class=ProfiledRoute)
 
-router = APIRouter()
+def _pdf_job_accepted(job):
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job.id, "status": job.status, "status_url": f"/api/sales-notes/pdf-jobs/{job.id}"},
+        headers={"Retry-After": "2"}
+    )
 
 @router.get("/", response_model=List[SalesNoteResponse])
 def read_sales_notes(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     customer_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    include_items: bool = Query(True, description="Load the line items of every note on the page"),
+    date_from: Optional[datetime] = Query(None, description="Only notes dated on or after this instant"),
+    date_to: Optional[datetime] = Query(None, description="Only notes dated before this instant"),
+    db: Session = Depends(get_read_db)
 ):
-    """Get all sales notes with pagination and filtering"""
-    return SalesNoteController.get_sales_notes(db, skip=skip, limit=limit, customer_id=customer_id)
+    """
+    Get all sales notes with pagination and filtering.
+    The cursor of the next page is returned in the X-Next-Cursor header; passing it back
+    keeps deep pages as cheap as the first one. ``skip`` is ignored when a cursor is given.
+    """
+    if FAST_JSON_RESPONSES:
+        documents, next_cursor = SalesNoteController.get_sales_note_documents(
+            db, skip=skip, limit=limit, customer_id=customer_id, cursor=cursor, include_items=include_items,
+            date_from=date_from, date_to=date_to
+        )
+        return FastJSONResponse(documents, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+    notes, next_cursor = SalesNoteController.get_sales_notes(
+        db, skip=skip, limit=limit, customer_id=customer_id, cursor=cursor, include_items=include_items,
+        date_from=date_from, date_to=date_to
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return notes
 
 @router.post("/", response_model=SalesNoteResponse, status_code=201)
 def create_sales_note(
     sales_note: SalesNoteCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=MAX_KEY_LENGTH, description="Retries with the same key replay the first response"),
     db: Session = Depends(get_db)
 ):
     """Create a new sales note"""
+    if idempotency_key:
+        status_code, body, replayed = SalesNoteController.create_sales_note_idempotent(db, sales_note, idempotency_key)
+        return JSONResponse(status_code=status_code, content=body, headers={"Idempotent-Replayed": str(replayed).lower()})
     return SalesNoteController.create_sales_note(db, sales_note)
 
+@router.post("/bulk", response_model=SalesNoteBulkResponse)
+def create_sales_notes_bulk(
+    sales_notes: List[SalesNoteCreate] = Body(...),
+    db: Session = Depends(get_db)
+):
+    """Create many sales notes in one transaction, reporting the outcome of each note"""
+    if len(sales_notes) > BULK_MAX_NOTES:
+        raise HTTPException(status_code=400, detail=f"A bulk request may contain at most {BULK_MAX_NOTES} sales notes")
+    return SalesNoteController.create_sales_notes_bulk(db, sales_notes)
+
+@router.post("/status", response_model=SalesNoteStatusBulkResponse)
+def change_status_bulk(
+    request: SalesNoteStatusBulkRequest,
+    db: Session = Depends(get_db)
+):
+    """Change the status of many sales notes at once, reporting the outcome for each note"""
+    if len(request.sales_note_ids) > BULK_MAX_NOTES:
+        raise HTTPException(status_code=400, detail=f"A bulk request may contain at most {BULK_MAX_NOTES} sales notes")
+    return SalesNoteController.change_status_bulk(db, request.sales_note_ids, request.status)
+
+@router.get("/stats", response_model=SalesNoteStatsResponse)
+def read_sales_note_stats(
+    group_by: str = Query("day", pattern="^(day|month|customer|status)$"),
+    date_from: Optional[date] = Query(None, description="Include notes dated on or after this day"),
+    date_to: Optional[date] = Query(None, description="Include notes dated before this day"),
+    customer_id: Optional[int] = Query(None),
+    status: Optional[str] = Query(None),
+    db: Session = Depends(get_read_db)
+):
+    """Get note counts, totals and tax grouped by day, month, customer or status"""
+    return SalesNoteController.get_stats(db, group_by, date_from, date_to, customer_id, status)
+
+@router.get("/search", response_model=List[SalesNoteResponse])
+def search_sales_notes(
+    response: Response,
+    customer_id: Optional[int] = Query(None),
+    status: Optional[List[str]] = Query(None, description="Repeat to match any of several statuses"),
+    date_from: Optional[datetime] = Query(None, description="Only notes dated on or after this instant"),
+    date_to: Optional[datetime] = Query(None, description="Only notes dated before this instant"),
+    min_total: Optional[float] = Query(None, ge=0),
+    max_total: Optional[float] = Query(None, ge=0),
+    note_number: Optional[str] = Query(None, min_length=1, description="Note number prefix"),
+    sort: str = Query("-created_at", pattern="^-?(created_at|note_date|total_amount)$", description="Prefix with - for descending"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    include_items: bool = Query(True, description="Load the line items of every note on the page"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Search sales notes by customer, status, date range, total range and note-number prefix,
+    combined as AND, sorted by creation, note date or total. Pages are keyset paginated
+    like the listing, so the cursor is only valid with the same filters and sort.
+    """
+    filters = {
+        "customer_id": customer_id, "statuses": status, "date_from": date_from, "date_to": date_to,
+        "min_total": min_total, "max_total": max_total, "note_number_prefix": note_number
+    }
+    if FAST_JSON_RESPONSES:
+        documents, next_cursor = SalesNoteController.search_sales_note_documents(
+            db, filters, sort=sort, limit=limit, cursor=cursor, include_items=include_items
+        )
+        return FastJSONResponse(documents, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+    notes, next_cursor = SalesNoteController.search_sales_notes(
+        db, filters, sort=sort, limit=limit, cursor=cursor, include_items=include_items
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return notes
+
+@router.get("/changes", response_model=SalesNoteChangesResponse)
+async def read_sales_note_changes(
+    request: Request,
+    since: int = Query(0, ge=0, description="Seq of the last change already processed; 0 starts from the oldest one kept"),
+    limit: int = Query(CHANGE_FEED_BATCH_SIZE, ge=1, le=1000),
+    wait: float = Query(0, ge=0, le=CHANGE_FEED_MAX_WAIT, description="Seconds to wait for a change when there is none yet"),
+    last_event_id: Optional[int] = Header(None, ge=0, description="Resume position sent by EventSource on reconnect")
+):
+    """
+    Changes to sales notes after ``since``, in commit order. Consumers store ``next_since``
+    and pass it back, optionally long polling with ``wait``. With ``Accept: text/event-stream``
+    the changes are streamed as server-sent events instead, each carrying its seq as event id.
+    """
+    if last_event_id is not None:
+        since = last_event_id
+    replica = choose_read_replica(request)
+    streaming = "text/event-stream" in request.headers.get("accept", "")
+    try:
+        changes, next_since = await SalesNoteChangeFeed.poll(since, limit, 0 if streaming else wait, replica)
+    except UnknownChangePosition as e:
+        raise HTTPException(status_code=400, detail=f"{e}; resynchronise and start again from since=0")
+    except ValueError as e:
+        raise HTTPException(status_code=410, detail=f"{e}; resynchronise and start again from since=0")
+
+    if streaming:
+        return StreamingResponse(
+            SalesNoteChangeFeed.stream(next_since, limit, request.is_disconnected, replica, changes),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    return {"changes": changes, "next_since": next_since}
+
+@router.get("/export")
+def export_sales_notes(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    date_from: Optional[datetime] = Query(None, description="Include notes dated on or after this instant"),
+    date_to: Optional[datetime] = Query(None, description="Include notes dated before this instant"),
+    customer_id: Optional[int] = Query(None),
+    include_items: bool = Query(False),
+    include_archived: bool = Query(False, description="Also export paid and canceled notes moved to the archive")
+):
+    """Stream sales notes as NDJSON or CSV without loading the whole range into memory"""
+    filters = {
+        "date_from": date_from, "date_to": date_to, "customer_id": customer_id, "include_items": include_items,
+        "include_archived": include_archived, "replica": choose_read_replica(request)
+    }
+    if format == "csv":
+        return StreamingResponse(
+            SalesNoteExporter.csv(**filters),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="sales_notes.csv"'}
+        )
+    return StreamingResponse(SalesNoteExporter.ndjson(**filters), media_type="application/x-ndjson")
+
+@router.post("/pdf-batch")
+def render_pdf_batch(
+    request: PdfBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Render the PDFs of many sales notes at once, as one file per note or a single merged document.
+    With PDF jobs enabled the batch is queued and polled through /pdf-jobs/{job_id}; otherwise
+    only small batches are rendered while the request waits.
+    """
+    if PDF_JOBS_ENABLED:
+        return _pdf_job_accepted(SalesNoteController.enqueue_pdf_batch(db, request, PDF_BATCH_MAX_NOTES))
+    report = SalesNoteController.render_pdf_batch(db, request, PDF_BATCH_SYNC_MAX_NOTES)
+    if request.merge:
+        return FileResponse(
+            report["pdf_path"],
+            media_type="application/pdf",
+            filename="sales_notes.pdf",
+            headers={"X-Notes-Per-Sec": str(report["notes_per_sec"])}
+        )
+    return report
+
+@router.get("/pdf-jobs/{job_id}", response_model=PdfJobResponse)
+def read_pdf_job(
+    job_id: str = Path(...),
+    db: Session = Depends(get_db)
+):
+    """Get the status of a PDF rendering job"""
+    return SalesNoteController.get_pdf_job(db, job_id)
+
+@router.get("/pdf-jobs/{job_id}/pdf")
+def get_pdf_job_file(
+    request: Request,
+    job_id: str = Path(...),
+    db: Session = Depends(get_db)
+):
+    """Download the document of a finished PDF job, e.g. a merged batch"""
+    job = SalesNoteController.get_pdf_job(db, job_id)
+    if job.status in ("queued", "running"):
+        return _pdf_job_accepted(job)
+    if job.status == "done" and job.pdf_path:
+        filename = f"sales_note_{job.sales_note_id}.pdf" if job.sales_note_id is not None else "sales_notes.pdf"
+        response = stored_pdf_response(request, job.pdf_path, filename)
+        if response is not None:
+            return response
+        # Merged batches are written next to the stored renders rather than into the storage backend
+        if os.path.exists(job.pdf_path):
+            return FileResponse(job.pdf_path, media_type="application/pdf", filename=filename)
+    raise HTTPException(status_code=404, detail="PDF not found")
+
+@router.get("/pdf-cache/stats")
+def read_pdf_cache_stats():
+    """Get PDF cache hit/miss counters for this process"""
+    return PDFCache.stats()
+
+@router.get("/lookup-cache/stats")
+def read_lookup_cache_stats():
+    """Get customer/product lookup cache statistics for this process"""
+    return {"customers": customer_cache.stats(), "products": product_cache.stats()}
+
+@router.post("/lookup-cache/invalidate")
+def invalidate_lookup_cache(request: LookupCacheInvalidate):
+    """Drop cached customers/products after they changed in their owning service"""
+    invalidate_lookup_caches(request.customer_ids, request.product_ids, everything=request.everything)
+    return {"message": "Lookup cache invalidated"}
+
 @router.get("/{sales_note_id}", response_model=SalesNoteResponse)
 def read_sales_note(
     sales_note_id: int = Path(..., gt=0),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get a specific sales note by ID"""
-    return SalesNoteController.get_sales_note(db, sales_note_id)
+    if FAST_JSON_RESPONSES:
+        return FastJSONResponse(SalesNoteController.get_sales_note_document(db, sales_note_id, include_archived=True))
+    return SalesNoteController.get_sales_note(db, sales_note_id, include_archived=True)
 
 @router.put("/{sales_note_id}", response_model=SalesNoteResponse)
 def update_sales_note(
@@ -60,22 +297,46 @@ def generate_pdf(
     db: Session = Depends(get_db)
 ):
     """Generate PDF for a sales note"""
+    if PDF_JOBS_ENABLED:
+        cached = SalesNoteController.get_cached_pdf(db, sales_note_id)
+        if cached is not None:
+            return cached
+        return _pdf_job_accepted(SalesNoteController.enqueue_pdf_job(db, sales_note_id))
     return SalesNoteController.generate_pdf(db, sales_note_id)
 
 @router.get("/{sales_note_id}/pdf")
 def get_pdf(
+    request: Request,
     sales_note_id: int = Path(..., gt=0),
-    db: Session = Depends(get_db)
+    stream: bool = Query(False, description="Render in memory when no stored PDF exists"),
+    db: Session = Depends(get_read_db)
 ):
     """Get the PDF file for a sales note"""
     sales_note = SalesNoteController.get_sales_note(db, sales_note_id)
+    filename = f"sales_note_{sales_note_id}.pdf"
+
+    if sales_note.pdf_path:
+        response = stored_pdf_response(request, sales_note.pdf_path, filename)
+        if response is not None:
+            return response
 
-    if not sales_note.pdf_path or not os.path.exists(sales_note.pdf_path):
-        raise HTTPException(status_code=404, detail="PDF not found. Generate it first.")
+    if stream:
+        data, fingerprint, pdf_path = SalesNoteController.get_pdf_document(db, sales_note_id)
+        response = stored_pdf_response(request, pdf_path, filename) if pdf_path else None
+        if response is not None:
+            return response
+        etag = f'"{fingerprint[:32]}"'
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        return pdf_bytes_response(PDFGenerator.render_bytes(data), fingerprint, filename)
 
-    return FileResponse(sales_note.pdf_path, media_type="application/pdf", filename=f"sales_note_{sales_note_id}.pdf")
+    # A render may still be in progress in the worker pool
+    job = SalesNoteController.get_pending_pdf_job(db, sales_note_id)
+    if job is not None:
+        return _pdf_job_accepted(job)
+    raise HTTPException(status_code=404, detail="PDF not found. Generate it first.")
 
-@router.post("/{sales_note_id}/status")
+@router.post("/{sales_note_id}/status", response_model=SalesNoteResponse)
 def change_status(
     sales_note_id: int = Path(..., gt=0),
     status: str = Body(..., embed=True),
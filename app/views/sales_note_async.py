@@ -0,0 +1,95 @@
+# app/views/sales_note_async.py
+from fastapi import APIRouter, Depends, Query, Path, Body, Header, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
+
+from app.schemas.sales_note import SalesNoteCreate, SalesNoteUpdate, SalesNoteResponse
+from app.controllers.sales_note_async import AsyncSalesNoteController
+from app.database import get_async_db, get_async_read_db
+from app.utils.idempotency import MAX_KEY_LENGTH
+from app.utils.fast_json import FastJSONResponse
+from app.config import FAST_JSON_RESPONSES
+from app.middleware.profiling import ProfiledRoute
+
+# Included ahead of the sync router when DB_ASYNC_MODE is enabled, so these handlers take
+# precedence for the CRUD routes. The int convertor keeps literal paths such as /export
+# falling through to the sync router.
+router = APIRouter(prefix="/api/sales-notes", tags=["sales-notes"], route_class=ProfiledRoute)
+
+@router.get("/", response_model=List[SalesNoteResponse])
+async def read_sales_notes(
+    response: Response,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    customer_id: Optional[int] = Query(None),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page"),
+    include_items: bool = Query(True, description="Load the line items of every note on the page"),
+    date_from: Optional[datetime] = Query(None, description="Only notes dated on or after this instant"),
+    date_to: Optional[datetime] = Query(None, description="Only notes dated before this instant"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get all sales notes with pagination and filtering"""
+    if FAST_JSON_RESPONSES:
+        documents, next_cursor = await AsyncSalesNoteController.get_sales_note_documents(
+            db, skip=skip, limit=limit, customer_id=customer_id, cursor=cursor, include_items=include_items,
+            date_from=date_from, date_to=date_to
+        )
+        return FastJSONResponse(documents, headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+    notes, next_cursor = await AsyncSalesNoteController.get_sales_notes(
+        db, skip=skip, limit=limit, customer_id=customer_id, cursor=cursor, include_items=include_items,
+        date_from=date_from, date_to=date_to
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return notes
+
+@router.post("/", response_model=SalesNoteResponse, status_code=201)
+async def create_sales_note(
+    sales_note: SalesNoteCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=MAX_KEY_LENGTH, description="Retries with the same key replay the first response"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create a new sales note"""
+    if idempotency_key:
+        status_code, body, replayed = await AsyncSalesNoteController.create_sales_note_idempotent(db, sales_note, idempotency_key)
+        return JSONResponse(status_code=status_code, content=body, headers={"Idempotent-Replayed": str(replayed).lower()})
+    return await AsyncSalesNoteController.create_sales_note(db, sales_note)
+
+@router.get("/{sales_note_id:int}", response_model=SalesNoteResponse)
+async def read_sales_note(
+    sales_note_id: int = Path(..., gt=0),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get a specific sales note by ID"""
+    if FAST_JSON_RESPONSES:
+        return FastJSONResponse(await AsyncSalesNoteController.get_sales_note_document(db, sales_note_id, include_archived=True))
+    return await AsyncSalesNoteController.get_sales_note(db, sales_note_id, include_archived=True)
+
+@router.put("/{sales_note_id:int}", response_model=SalesNoteResponse)
+async def update_sales_note(
+    sales_note_id: int = Path(..., gt=0),
+    sales_note: SalesNoteUpdate = Body(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Update a sales note"""
+    return await AsyncSalesNoteController.update_sales_note(db, sales_note_id, sales_note)
+
+@router.delete("/{sales_note_id:int}")
+async def delete_sales_note(
+    sales_note_id: int = Path(..., gt=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Delete a sales note"""
+    return await AsyncSalesNoteController.delete_sales_note(db, sales_note_id)
+
+@router.post("/{sales_note_id:int}/status", response_model=SalesNoteResponse)
+async def change_status(
+    sales_note_id: int = Path(..., gt=0),
+    status: str = Body(..., embed=True),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Change the status of a sales note"""
+    return await AsyncSalesNoteController.change_status(db, sales_note_id, status)
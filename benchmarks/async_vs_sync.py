@@ -0,0 +1,81 @@
+# benchmarks/async_vs_sync.py
+"""
+Load test comparing the sync (threadpool) and async (asyncpg) database modes.
+
+Starts uvicorn once per mode with DB_ASYNC_MODE set accordingly, drives a mix of
+detail and list requests with a fixed number of concurrent clients for a fixed
+duration, and reports requests/sec and p50/p99 latency. Uses the database
+configured through the DB_* environment variables; the sales_notes table needs
+some rows (see benchmarks.bulk_create or benchmarks.run).
+
+    python -m benchmarks.async_vs_sync --concurrency 64 --duration 20
+"""
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from benchmarks.common import percentile, print_table, start_server
+
+
+async def load(base_url: str, concurrency: int, duration: float, list_ratio: float):
+    async with httpx.AsyncClient(base_url=base_url, timeout=30, limits=httpx.Limits(max_connections=concurrency)) as client:
+        notes = (await client.get("/api/sales-notes/", params={"limit": 1000, "include_items": False})).json()
+        ids = [note["id"] for note in notes]
+        if not ids:
+            raise RuntimeError("No sales notes to read; seed the database first")
+
+        latencies = []
+        errors = 0
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                if random.random() < list_ratio:
+                    request = client.get("/api/sales-notes/", params={"limit": 50})
+                else:
+                    request = client.get(f"/api/sales-notes/{random.choice(ids)}")
+                start = time.perf_counter()
+                response = await request
+                latencies.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per mode")
+    parser.add_argument("--list-ratio", type=float, default=0.2, help="share of list requests in the mix")
+    parser.add_argument("--port", type=int, default=8101)
+    args = parser.parse_args()
+
+    rows = []
+    for async_mode in (False, True):
+        process, base_url = start_server(args.port, {"DB_ASYNC_MODE": "true" if async_mode else "false"})
+        try:
+            latencies, errors, elapsed = asyncio.run(load(base_url, args.concurrency, args.duration, args.list_ratio))
+        finally:
+            process.terminate()
+            process.wait()
+        rows.append({
+            "mode": "async" if async_mode else "sync",
+            "requests": len(latencies),
+            "errors": errors,
+            "req/sec": f"{len(latencies) / elapsed:.0f}",
+            "p50_ms": f"{percentile(latencies, 50):.1f}",
+            "p99_ms": f"{percentile(latencies, 99):.1f}"
+        })
+    print_table(rows, ["mode", "requests", "errors", "req/sec", "p50_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# benchmarks/bulk_create.py
+"""
+Compares one-at-a-time note creation with the bulk endpoint's controller path.
+
+Reports database round trips and wall time as the number of notes and the number
+of items per note grow.
+
+    python -m benchmarks.bulk_create --notes 10 100 1000 --items 1 10 50
+"""
+import argparse
+import random
+
+from sqlalchemy import text
+
+from app.database import SessionLocal, get_engine
+from app.schema import create_schema
+from app.schemas.sales_note import SalesNoteCreate
+from app.controllers.sales_note import SalesNoteController
+from app.utils.lookup_cache import invalidate_lookup_caches
+from app.utils.sales_stats import SalesNoteRollup
+from benchmarks.common import RoundTripCounter, timer, seed_reference_data, print_table
+
+
+def build_payloads(count, items_per_note, customer_ids, product_ids):
+    payloads = []
+    for _ in range(count):
+        items = []
+        for _ in range(items_per_note):
+            quantity = random.randint(1, 5)
+            unit_price = round(random.uniform(1, 100), 2)
+            items.append({
+                "product_id": random.choice(product_ids),
+                "quantity": quantity,
+                "unit_price": unit_price,
+                "subtotal": round(quantity * unit_price, 2)
+            })
+        total = round(sum(item["subtotal"] for item in items), 2) or 1.0
+        payloads.append(SalesNoteCreate(
+            customer_id=random.choice(customer_ids),
+            total_amount=total,
+            tax_amount=round(total * 0.16, 2),
+            items=items
+        ))
+    return payloads
+
+
+def run_sequential(payloads):
+    db = SessionLocal()
+    try:
+        with RoundTripCounter(get_engine()) as counter, timer() as elapsed:
+            ids = [SalesNoteController.create_sales_note(db, payload).id for payload in payloads]
+    finally:
+        db.close()
+    return ids, counter.count, elapsed["seconds"]
+
+
+def run_bulk(payloads):
+    db = SessionLocal()
+    try:
+        with RoundTripCounter(get_engine()) as counter, timer() as elapsed:
+            result = SalesNoteController.create_sales_notes_bulk(db, payloads)
+    finally:
+        db.close()
+    ids = [entry["sales_note_id"] for entry in result["results"] if entry["success"]]
+    return ids, counter.count, elapsed["seconds"]
+
+
+def cleanup(ids):
+    """Removes the created notes together with their daily stats and change-feed entries."""
+    with get_engine().begin() as conn:
+        notes = conn.execute(
+            text("DELETE FROM sales_notes WHERE id = ANY(:ids) RETURNING note_date, customer_id, status, total_amount, tax_amount"),
+            {"ids": ids}
+        ).all()
+        SalesNoteRollup.apply(conn, [SalesNoteRollup.delta(note, -1) for note in notes])
+        conn.execute(text("DELETE FROM sales_note_items WHERE sales_note_id = ANY(:ids)"), {"ids": ids})
+        conn.execute(text("DELETE FROM sales_note_changes WHERE sales_note_id = ANY(:ids)"), {"ids": ids})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--items", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    create_schema()
+    customer_ids, product_ids = seed_reference_data(get_engine())
+
+    rows = []
+    for note_count in args.notes:
+        for items_per_note in args.items:
+            payloads = build_payloads(note_count, items_per_note, customer_ids, product_ids)
+            for mode, runner in (("sequential", run_sequential), ("bulk", run_bulk)):
+                # Start each run with cold customer/product caches
+                invalidate_lookup_caches(everything=True)
+                ids, round_trips, seconds = runner(payloads)
+                cleanup(ids)
+                rows.append({
+                    "mode": mode,
+                    "notes": note_count,
+                    "items/note": items_per_note,
+                    "round_trips": round_trips,
+                    "seconds": f"{seconds:.3f}",
+                    "notes/sec": f"{note_count / seconds:.0f}" if seconds else "-"
+                })
+
+    print_table(rows, ["mode", "notes", "items/note", "round_trips", "seconds", "notes/sec"])
+
+
+if __name__ == "__main__":
+    main()
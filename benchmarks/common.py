@@ -0,0 +1,117 @@
+# benchmarks/common.py
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against the database configured through the usual DB_* environment
+variables, so point them at a throwaway database before running them. They need the
+development requirements (pip install -r requirements-dev.txt).
+"""
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import httpx
+from sqlalchemy import event, text
+
+
+class RoundTripCounter:
+    """Counts cursor executions (one per database round trip) issued through an engine."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+@contextmanager
+def timer():
+    result = {"seconds": 0.0}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result["seconds"] = time.perf_counter() - start
+
+
+def seed_reference_data(engine, customers: int = 100, products: int = 500):
+    """
+    Creates minimal customers/products tables (owned by other services in production)
+    and makes sure they contain at least the requested number of rows.
+    Returns the lists of customer and product ids.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS customers ("
+            "id SERIAL PRIMARY KEY, name VARCHAR NOT NULL, email VARCHAR NOT NULL, phone VARCHAR)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS products ("
+            "id SERIAL PRIMARY KEY, name VARCHAR NOT NULL, price FLOAT NOT NULL)"
+        ))
+
+        existing = conn.execute(text("SELECT count(*) FROM customers")).scalar()
+        if existing < customers:
+            conn.execute(
+                text("INSERT INTO customers (name, email, phone) VALUES (:name, :email, :phone)"),
+                [
+                    {"name": f"Customer {n}", "email": f"customer{n}@example.com", "phone": None}
+                    for n in range(existing, customers)
+                ]
+            )
+
+        existing = conn.execute(text("SELECT count(*) FROM products")).scalar()
+        if existing < products:
+            conn.execute(
+                text("INSERT INTO products (name, price) VALUES (:name, :price)"),
+                [{"name": f"Product {n}", "price": 1.0 + n % 100} for n in range(existing, products)]
+            )
+
+        customer_ids = [row[0] for row in conn.execute(text("SELECT id FROM customers ORDER BY id LIMIT :n"), {"n": customers})]
+        product_ids = [row[0] for row in conn.execute(text("SELECT id FROM products ORDER BY id LIMIT :n"), {"n": products})]
+    return customer_ids, product_ids
+
+
+def print_table(rows, columns):
+    widths = [max(len(str(column)), *(len(str(row[column])) for row in rows)) for column in columns]
+    print("  ".join(str(column).ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(str(row[column]).ljust(width) for column, width in zip(columns, widths)))
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def start_server(port: int, env: dict = None):
+    """Starts uvicorn serving main:app with extra environment variables; returns (process, base_url)."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=dict(os.environ, **(env or {})), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            if httpx.get(f"{base_url}/health").status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("uvicorn did not start")
@@ -0,0 +1,110 @@
+# benchmarks/middleware_overhead.py
+"""
+Measures per-request overhead of the metrics middleware.
+
+Compares an app without metrics, the previous BaseHTTPMiddleware-based
+implementation and the current raw ASGI middleware on a small JSON route and a
+file download. Requests are driven straight through the ASGI interface, so no
+network or HTTP client cost is included. No database is needed.
+
+    python -m benchmarks.middleware_overhead --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import FileResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.middleware.metrics import CloudWatchMetricsMiddleware
+from app.utils.metrics_aggregator import MetricsAggregator, InMemoryExporter
+from benchmarks.common import print_table
+
+
+class LegacyMetricsMiddleware(BaseHTTPMiddleware):
+    """The previous implementation's request path, recording into the same aggregator."""
+
+    def __init__(self, app, aggregator):
+        super().__init__(app)
+        self.aggregator = aggregator
+
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        execution_time = (time.time() - start_time) * 1000
+        self.aggregator.record_request(request.url.path, request.method, response.status_code, execution_time)
+        return response
+
+
+def build_app(middleware, pdf_path):
+    app = FastAPI()
+
+    @app.get("/api/sales-notes/{sales_note_id}")
+    async def read_sales_note(sales_note_id: int):
+        return {"id": sales_note_id}
+
+    @app.get("/api/sales-notes/{sales_note_id}/pdf")
+    async def get_pdf(sales_note_id: int):
+        return FileResponse(pdf_path, media_type="application/pdf")
+
+    if middleware is not None:
+        app.add_middleware(middleware, aggregator=MetricsAggregator(InMemoryExporter()))
+    return app
+
+
+async def drive(app, path, requests):
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    scope_template = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "root_path": "", "query_string": b"", "headers": [],
+        "server": ("testserver", 80), "client": ("testclient", 50000),
+    }
+
+    # Warm up the middleware stack and route caches
+    for n in range(50):
+        await app({**scope_template, "path": path.format(n=n), "raw_path": path.format(n=n).encode()}, receive, send)
+
+    start = time.perf_counter()
+    for n in range(requests):
+        await app({**scope_template, "path": path.format(n=n), "raw_path": path.format(n=n).encode()}, receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--pdf-size", type=int, default=1024 * 1024, help="size of the downloaded file in bytes")
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as pdf:
+        pdf.write(os.urandom(args.pdf_size))
+
+    try:
+        rows = []
+        variants = (("none", None), ("BaseHTTPMiddleware", LegacyMetricsMiddleware), ("ASGI", CloudWatchMetricsMiddleware))
+        for route, path in (("json", "/api/sales-notes/{n}"), ("file", "/api/sales-notes/{n}/pdf")):
+            baseline = None
+            for name, middleware in variants:
+                micros = asyncio.run(drive(build_app(middleware, pdf.name), path, args.requests))
+                baseline = micros if baseline is None else baseline
+                rows.append({
+                    "route": route,
+                    "middleware": name,
+                    "us/request": f"{micros:.1f}",
+                    "overhead_us": f"{micros - baseline:.1f}"
+                })
+        print_table(rows, ["route", "middleware", "us/request", "overhead_us"])
+    finally:
+        os.remove(pdf.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# benchmarks/pdf_batch.py
+"""
+Measures PDF batch rendering throughput.
+
+Renders synthetic sales notes (no database needed) one file per note in process,
+one file per note across a process pool, and as a single merged document. Files
+are written to a temporary directory that is removed afterwards.
+
+    python -m benchmarks.pdf_batch --notes 10 1000 10000 --workers 4
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+# Point the PDF store at a scratch directory before the app settings are loaded. Spawned
+# pool workers re-import this module and inherit the directory through the environment.
+if "PDF_BATCH_BENCH_DIR" not in os.environ:
+    os.environ["PDF_BATCH_BENCH_DIR"] = tempfile.mkdtemp(prefix="pdf_batch_bench_")
+STORAGE_PATH = os.environ["PDF_BATCH_BENCH_DIR"]
+os.environ["PDF_STORAGE_PATH"] = STORAGE_PATH
+os.environ["PDF_CACHE_MAX_BYTES"] = "0"
+
+from app.utils.pdf_batch import PDFBatchRenderer  # noqa: E402
+from benchmarks.common import timer, print_table  # noqa: E402
+
+
+def build_documents(count, items_per_note):
+    start_date = datetime(2024, 1, 1)
+    documents = []
+    for sales_note_id in range(1, count + 1):
+        items = []
+        for _ in range(items_per_note):
+            quantity = random.randint(1, 5)
+            unit_price = round(random.uniform(1, 100), 2)
+            items.append({
+                "product_name": f"Product {random.randint(1, 500)}",
+                "quantity": quantity,
+                "unit_price": unit_price,
+                "subtotal": round(quantity * unit_price, 2)
+            })
+        total = round(sum(item["subtotal"] for item in items), 2)
+        documents.append({
+            "note": {
+                "id": sales_note_id,
+                "note_number": f"SN-BENCH-{sales_note_id:06d}",
+                "note_date": (start_date + timedelta(minutes=sales_note_id)).strftime('%Y-%m-%d'),
+                "status": "issued",
+                "total_amount": total,
+                "tax_amount": round(total * 0.16, 2)
+            },
+            "customer": {"name": f"Customer {sales_note_id % 100}", "email": "bench@example.com", "phone": "555-0100"},
+            "items": items
+        })
+    return documents
+
+
+def clear_storage():
+    for name in os.listdir(STORAGE_PATH):
+        os.remove(os.path.join(STORAGE_PATH, name))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--items", type=int, default=10, help="items per note")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    rows = []
+    try:
+        for note_count in args.notes:
+            documents = build_documents(note_count, args.items)
+            modes = (
+                ("files, 1 process", lambda: PDFBatchRenderer.render_files(documents, workers=1)),
+                (f"files, {args.workers} processes", lambda: PDFBatchRenderer.render_files(documents, workers=args.workers)),
+                ("merged", lambda: PDFBatchRenderer.render_merged(documents, os.path.join(STORAGE_PATH, "merged.pdf"))),
+            )
+            for mode, run in modes:
+                clear_storage()
+                with timer() as elapsed:
+                    run()
+                seconds = elapsed["seconds"]
+                rows.append({
+                    "notes": note_count,
+                    "mode": mode,
+                    "seconds": f"{seconds:.2f}",
+                    "notes/sec": f"{note_count / seconds:.0f}" if seconds else "-"
+                })
+    finally:
+        shutil.rmtree(STORAGE_PATH, ignore_errors=True)
+
+    print_table(rows, ["notes", "mode", "seconds", "notes/sec"])
+
+
+if __name__ == "__main__":
+    main()
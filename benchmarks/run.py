@@ -0,0 +1,260 @@
+# benchmarks/run.py
+"""
+Benchmark suite for the sales-notes API.
+
+Seeds the database configured through the DB_* environment variables (point them
+at a throwaway Postgres database; the service relies on Postgres features, so
+SQLite is not supported) with customers, products and notes, then drives each
+workload through the ASGI app in process and/or over HTTP against a uvicorn
+server, with a fixed number of concurrent clients. Throughput and p50/p95/p99
+latency are printed and saved as JSON; pass an earlier result file with
+--compare to see how a change moved the numbers.
+
+    python -m benchmarks.run --notes 5000 --requests 500 --concurrency 16
+    python -m benchmarks.run --transport http --workloads list detail --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import httpx
+from sqlalchemy import text
+
+from benchmarks.common import percentile, print_table, seed_reference_data, start_server
+
+WORKLOADS = ("create", "list", "detail", "status", "pdf-generate", "pdf-download")
+TRANSPORTS = ("inprocess", "http")
+
+# Notes whose PDF is rendered up front so pdf-download has something to fetch
+DOWNLOAD_POOL_SIZE = 50
+
+
+def random_note(customer_ids, product_ids, items_per_note):
+    items = []
+    for _ in range(items_per_note):
+        quantity = random.randint(1, 5)
+        unit_price = round(random.uniform(1, 100), 2)
+        items.append({
+            "product_id": random.choice(product_ids),
+            "quantity": quantity,
+            "unit_price": unit_price,
+            "subtotal": round(quantity * unit_price, 2)
+        })
+    total = round(sum(item["subtotal"] for item in items), 2) or 1.0
+    return {
+        "customer_id": random.choice(customer_ids),
+        "total_amount": total,
+        "tax_amount": round(total * 0.16, 2),
+        "items": items
+    }
+
+
+def seed(args):
+    """Tops the database up to the requested sizes and returns the ids the workloads pick from."""
+    from app.config import BULK_MAX_NOTES
+    from app.controllers.sales_note import SalesNoteController
+    from app.database import SessionLocal, get_engine
+    from app.schema import create_schema
+    from app.schemas.sales_note import SalesNoteCreate
+
+    engine = get_engine()
+    create_schema(engine)
+    customer_ids, product_ids = seed_reference_data(engine, args.customers, args.products)
+
+    db = SessionLocal()
+    try:
+        existing = db.execute(text("SELECT count(*) FROM sales_notes")).scalar()
+        missing = max(args.notes - existing, 0)
+        for start in range(0, missing, BULK_MAX_NOTES):
+            payloads = [
+                SalesNoteCreate(**random_note(customer_ids, product_ids, args.items))
+                for _ in range(min(BULK_MAX_NOTES, missing - start))
+            ]
+            SalesNoteController.create_sales_notes_bulk(db, payloads)
+
+        note_ids = [row[0] for row in db.execute(text("SELECT id FROM sales_notes ORDER BY id DESC LIMIT :n"), {"n": args.notes})]
+        editable_ids = [
+            row[0] for row in db.execute(
+                text("SELECT id FROM sales_notes WHERE status IN ('draft', 'issued') ORDER BY id DESC LIMIT :n"),
+                {"n": args.notes + DOWNLOAD_POOL_SIZE}
+            )
+        ]
+    finally:
+        db.close()
+
+    # Status changes drop stored PDFs, so they never touch the download pool
+    download_ids = note_ids[:DOWNLOAD_POOL_SIZE]
+    return {
+        "customer_ids": customer_ids,
+        "product_ids": product_ids,
+        "note_ids": note_ids,
+        "editable_ids": [sales_note_id for sales_note_id in editable_ids if sales_note_id not in download_ids],
+        "download_ids": download_ids
+    }
+
+
+def build_request(workload, data, items_per_note):
+    """Returns (method, url, json body) for one request of a workload."""
+    if workload == "create":
+        return "POST", "/api/sales-notes/", random_note(data["customer_ids"], data["product_ids"], items_per_note)
+    if workload == "list":
+        return "GET", "/api/sales-notes/", None
+    if workload == "detail":
+        return "GET", f"/api/sales-notes/{random.choice(data['note_ids'])}", None
+    if workload == "status":
+        return "POST", f"/api/sales-notes/{random.choice(data['editable_ids'])}/status", {"status": random.choice(("draft", "issued"))}
+    if workload == "pdf-generate":
+        return "POST", f"/api/sales-notes/{random.choice(data['note_ids'])}/generate-pdf", None
+    return "GET", f"/api/sales-notes/{random.choice(data['download_ids'])}/pdf", None
+
+
+async def run_workload(client, workload, data, args):
+    latencies = []
+    errors = 0
+    remaining = args.requests
+
+    async def worker():
+        nonlocal errors, remaining
+        while remaining > 0:
+            remaining -= 1
+            method, url, body = build_request(workload, data, args.items)
+            start = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "workload": workload,
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "req_per_sec": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2)
+    }
+
+
+async def run_all(client, data, args):
+    # Render the download pool first so every pdf-download request finds a stored PDF
+    if "pdf-download" in args.workloads:
+        for sales_note_id in data["download_ids"]:
+            await client.post(f"/api/sales-notes/{sales_note_id}/generate-pdf")
+
+    results = []
+    for workload in args.workloads:
+        # A few untimed requests warm connection pools and caches
+        for _ in range(min(args.warmup, args.requests)):
+            method, url, body = build_request(workload, data, args.items)
+            await client.request(method, url, json=body)
+        results.append(await run_workload(client, workload, data, args))
+    return results
+
+
+async def run_inprocess(data, args):
+    from main import app
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60, limits=limits) as client:
+            return await run_all(client, data, args)
+
+
+async def run_http(base_url, data, args):
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        return await run_all(client, data, args)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline_path):
+    """Prints the change of each metric relative to an earlier result file."""
+    with open(baseline_path) as baseline_file:
+        baseline = {(row["transport"], row["workload"]): row for row in json.load(baseline_file)["results"]}
+
+    rows = []
+    for row in results:
+        before = baseline.get((row["transport"], row["workload"]))
+        if before is None:
+            continue
+        change = {"transport": row["transport"], "workload": row["workload"]}
+        for metric in ("req_per_sec", "p50_ms", "p95_ms", "p99_ms"):
+            change[metric] = f"{(row[metric] - before[metric]) / before[metric] * 100:+.1f}%" if before[metric] else "-"
+        rows.append(change)
+    if rows:
+        print(f"\nChange relative to {baseline_path}:")
+        print_table(rows, ["transport", "workload", "req_per_sec", "p50_ms", "p95_ms", "p99_ms"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--customers", type=int, default=100)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--notes", type=int, default=2000, help="notes the database is topped up to")
+    parser.add_argument("--items", type=int, default=5, help="items per seeded or created note")
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument("--transport", nargs="+", choices=TRANSPORTS, default=list(TRANSPORTS))
+    parser.add_argument("--requests", type=int, default=500, help="timed requests per workload")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed requests per workload")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--base-url", help="benchmark a running server instead of starting uvicorn for the http transport")
+    parser.add_argument("--port", type=int, default=8102)
+    parser.add_argument("--output", help="result file (default: benchmark-<timestamp>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="earlier result file to compare against")
+    args = parser.parse_args()
+
+    started_at = datetime.now(timezone.utc)
+    data = seed(args)
+    if not data["note_ids"]:
+        raise SystemExit("No sales notes to benchmark; raise --notes")
+
+    results = []
+    for transport in args.transport:
+        if transport == "inprocess":
+            rows = asyncio.run(run_inprocess(data, args))
+        elif args.base_url:
+            rows = asyncio.run(run_http(args.base_url, data, args))
+        else:
+            process, base_url = start_server(args.port)
+            try:
+                rows = asyncio.run(run_http(base_url, data, args))
+            finally:
+                process.terminate()
+                process.wait()
+        results.extend({"transport": transport, **row} for row in rows)
+
+    print_table(results, ["transport", "workload", "requests", "errors", "req_per_sec", "p50_ms", "p95_ms", "p99_ms"])
+
+    output = args.output or f"benchmark-{started_at.strftime('%Y%m%dT%H%M%SZ')}.json"
+    with open(output, "w") as result_file:
+        json.dump({
+            "started_at": started_at.isoformat(),
+            "git_revision": git_revision(),
+            "config": {name: value for name, value in vars(args).items() if name not in ("output", "compare")},
+            "results": results
+        }, result_file, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# benchmarks/search_plans.py
+"""
+Planner sanity check for GET /api/sales-notes/search.
+
+Tops sales_notes up to --notes rows spread over several years, statuses, customers
+and amounts, then EXPLAINs the statement the search controller builds for each
+supported filter combination and reports which indexes the plan uses. Any plan
+that scans sales_notes sequentially fails the check (exit status 1).
+
+    python -m benchmarks.search_plans --notes 100000 [--analyze]
+"""
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, text
+
+from app.controllers.sales_note import SalesNoteController
+from app.database import get_engine
+from app.schema import create_schema
+from app.utils.fast_json import SalesNoteSerializer
+from benchmarks.common import print_table, seed_reference_data
+
+PAGE_SIZE = 100
+
+# Filter combinations the search endpoint is expected to serve from an index, with a sort each
+CASES = [
+    ("status", {"statuses": ["issued"]}, "-created_at"),
+    ("open statuses", {"statuses": ["draft", "issued"]}, "note_date"),
+    ("status + date range", {"statuses": ["paid"], "date_from": "month_start", "date_to": "month_end"}, "-note_date"),
+    ("customer", {"customer_id": 7}, "-created_at"),
+    ("customer + date range", {"customer_id": 7, "date_from": "year_start", "date_to": "year_end"}, "-note_date"),
+    ("customer + status", {"customer_id": 7, "statuses": ["paid"]}, "-created_at"),
+    ("date range", {"date_from": "month_start", "date_to": "month_end"}, "note_date"),
+    ("total range", {"min_total": 1000, "max_total": 1010}, "-created_at"),
+    ("total range sorted", {"min_total": 1000, "max_total": 1500}, "total_amount"),
+    ("note number prefix", {"note_number_prefix": "SN-2024-AB"}, "-created_at"),
+    ("status + total range", {"statuses": ["issued"], "min_total": 1000, "max_total": 1010}, "-total_amount"),
+]
+
+
+def seed_notes(engine, notes: int, customers: int, years: int):
+    """Inserts synthetic notes (no items) until sales_notes holds ``notes`` rows, then refreshes statistics."""
+    seed_reference_data(engine, customers=customers)
+    with engine.begin() as conn:
+        missing = notes - conn.execute(text("SELECT count(*) FROM sales_notes")).scalar()
+        if missing > 0:
+            conn.execute(
+                text(
+                    "INSERT INTO sales_notes (note_number, customer_id, total_amount, tax_amount, note_date, status, created_at) "
+                    "SELECT 'SN-' || to_char(d, 'YYYY') || '-' || upper(substr(md5(random()::text || n), 1, 8)), "
+                    "       1 + (random() * (:customers - 1))::int, t, round((t * 0.16)::numeric, 2), d, "
+                    "       (ARRAY['paid', 'paid', 'paid', 'paid', 'paid', 'paid', 'issued', 'issued', 'draft', 'canceled'])[1 + n % 10], d "
+                    "FROM (SELECT n, now() - random() * (:years * interval '365 days') AS d, "
+                    "             round((random() * 5000)::numeric, 2)::float AS t "
+                    "      FROM generate_series(1, :missing) AS n) AS v "
+                    "ON CONFLICT (note_number) DO NOTHING"
+                ),
+                {"missing": missing, "customers": customers, "years": years}
+            )
+        conn.execute(text("ANALYZE sales_notes"))
+
+
+def resolve_dates(filters):
+    """Replaces the symbolic bounds of CASES with dates inside the seeded range."""
+    now = datetime.now()
+    month_start = (now - timedelta(days=60)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    bounds = {
+        "month_start": month_start,
+        "month_end": (month_start + timedelta(days=32)).replace(day=1),
+        "year_start": now.replace(year=now.year - 1, month=1, day=1, hour=0, minute=0, second=0, microsecond=0),
+        "year_end": now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0),
+    }
+    return {name: bounds.get(value, value) if isinstance(value, str) else value for name, value in filters.items()}
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", ()):
+        yield from plan_nodes(child)
+
+
+def explain(conn, filters, sort, analyze: bool):
+    statement = SalesNoteController._search(
+        select(*SalesNoteSerializer.note_columns()), resolve_dates(filters), sort, PAGE_SIZE
+    )
+    # Bound parameters, like the application sends them
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    options = "ANALYZE, FORMAT JSON" if analyze else "FORMAT JSON"
+    result = conn.exec_driver_sql(f"EXPLAIN ({options}) {compiled}", compiled.params).scalar()
+    return result[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=100000, help="minimum number of notes in sales_notes")
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--years", type=int, default=3, help="years of history the seeded notes span")
+    parser.add_argument("--analyze", action="store_true", help="run the statements and report their execution time")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    create_schema(engine)
+    seed_notes(engine, args.notes, args.customers, args.years)
+
+    rows = []
+    with engine.connect() as conn:
+        for name, filters, sort in CASES:
+            result = explain(conn, filters, sort, args.analyze)
+            nodes = list(plan_nodes(result["Plan"]))
+            sequential = any(
+                node["Node Type"] == "Seq Scan" and node.get("Relation Name") == "sales_notes" for node in nodes
+            )
+            indexes = sorted({node["Index Name"] for node in nodes if "Index Name" in node})
+            row = {
+                "filters": name,
+                "sort": sort,
+                "access": "Seq Scan" if sequential else ", ".join(indexes) or "-",
+                "ok": "no" if sequential else "yes",
+            }
+            if args.analyze:
+                row["ms"] = round(result["Execution Time"], 2)
+            rows.append(row)
+
+    columns = ["filters", "sort", "access", "ok"] + (["ms"] if args.analyze else [])
+    print_table(rows, columns)
+    failed = [row["filters"] for row in rows if row["ok"] == "no"]
+    if failed:
+        print(f"Sequential scans for: {', '.join(failed)}", file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
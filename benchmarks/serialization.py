@@ -0,0 +1,101 @@
+# benchmarks/serialization.py
+"""
+Serialization cost of a sales-note page: the response-model path FastAPI takes for
+List[SalesNoteResponse] (validate the ORM objects, dump them to JSON-compatible
+data, encode with the stdlib json module) against the FAST_JSON_RESPONSES path
+(zip column tuples into dicts, encode with orjson).
+
+Synthetic notes are built in memory, so no database is needed and only the
+serialization is timed. Both paths must produce identical bytes.
+
+    python -m benchmarks.serialization --notes 1000 --items 5
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.models.sales_note import SalesNote, SalesNoteItem
+from app.schemas.sales_note import SalesNoteResponse
+from app.utils.fast_json import NOTE_FIELDS, ITEM_FIELDS, SalesNoteSerializer, FastJSONResponse
+from benchmarks.common import print_table
+
+
+def build_notes(count: int, items_per_note: int):
+    """Returns the same page as ORM objects and as (note rows, item rows) tuples."""
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    notes = []
+    for n in range(count):
+        note = SalesNote(
+            id=n + 1, note_number=f"SN-2024-{n:08X}", customer_id=n % 100 + 1,
+            total_amount=round(10 + n * 1.37, 2), tax_amount=round((10 + n * 1.37) * 0.16, 2),
+            note_date=datetime(2024, 1, 1) + timedelta(minutes=n), status="issued",
+            pdf_path=None, created_at=created + timedelta(seconds=n, microseconds=n), updated_at=None
+        )
+        note.items = [
+            SalesNoteItem(
+                id=n * items_per_note + i + 1, sales_note_id=n + 1, product_id=i + 1, quantity=i + 1,
+                unit_price=9.99, subtotal=round(9.99 * (i + 1), 2),
+                created_at=created + timedelta(seconds=n), updated_at=None
+            )
+            for i in range(items_per_note)
+        ]
+        notes.append(note)
+
+    note_rows = [tuple(getattr(note, name) for name in NOTE_FIELDS) for note in notes]
+    item_rows = [tuple(getattr(item, name) for name in ITEM_FIELDS) for note in notes for item in note.items]
+    return notes, note_rows, item_rows
+
+
+def response_model_path(adapter, notes):
+    # What FastAPI does for a response_model: validate, serialize, then json.dumps
+    content = adapter.dump_python(adapter.validate_python(notes, from_attributes=True), mode="json")
+    return JSONResponse(content).body
+
+
+def fast_path(note_rows, item_rows):
+    return FastJSONResponse(SalesNoteSerializer.documents(note_rows, item_rows)).body
+
+
+def measure(function, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=1000, help="notes per page")
+    parser.add_argument("--items", type=int, nargs="+", default=[0, 5, 20], help="items per note")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    adapter = TypeAdapter(List[SalesNoteResponse])
+    rows = []
+    for items_per_note in args.items:
+        notes, note_rows, item_rows = build_notes(args.notes, items_per_note)
+        if response_model_path(adapter, notes) != fast_path(note_rows, item_rows):
+            raise SystemExit("The fast path does not produce the same bytes as the response model")
+
+        slow = measure(lambda: response_model_path(adapter, notes), args.repeat)
+        fast = measure(lambda: fast_path(note_rows, item_rows), args.repeat)
+        per_1k = 1000 / args.notes
+        rows.append({
+            "items_per_note": items_per_note,
+            "response_model_ms_per_1k": round(slow * per_1k, 2),
+            "fast_ms_per_1k": round(fast * per_1k, 2),
+            "speedup": f"{slow / fast:.1f}x"
+        })
+
+    print_table(rows, ["items_per_note", "response_model_ms_per_1k", "fast_ms_per_1k", "speedup"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/startup.py
+"""
+Startup benchmark: how long a fresh interpreter takes to import main:app, which heavy
+modules that import pulls in, and how long uvicorn takes to answer its first /health.
+
+Imports run in subprocesses with the DB_* variables pointing at an unreachable port,
+so a slow or failing import caused by touching the database shows up here. The server
+measurement uses the database configured through the usual DB_* variables (run
+"python manage.py migrate" against it first).
+
+    python -m benchmarks.startup --repeat 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.common import print_table, start_server
+
+# Modules that should only be loaded once a request needs them
+HEAVY_MODULES = ("fpdf", "PIL", "fontTools", "boto3", "botocore", "psycopg", "asyncpg")
+
+IMPORT_PROBE = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import main\n"
+    "seconds = time.perf_counter() - start\n"
+    f"print(json.dumps({{'seconds': seconds, 'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))\n"
+)
+
+# No database listens here; importing the app must not need one
+OFFLINE_DB_ENV = {"DB_HOST": "127.0.0.1", "DB_PORT": "9", "DB_NAME": "none", "DB_USER": "none", "DB_PASSWORD": ""}
+
+
+def probe_import():
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE],
+        env=dict(os.environ, **OFFLINE_DB_ENV), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"Importing main failed without a database:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def import_profile(top: int):
+    """Returns the modules imported directly under main with the largest cumulative import time (python -X importtime)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        env=dict(os.environ, **OFFLINE_DB_ENV), capture_output=True, text=True
+    )
+    packages = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, _, cumulative_us, name = line.replace("import time:", "|", 1).split("|")
+        # importtime indents each nesting level by two spaces; main itself sits at level 0
+        if len(name) - len(name.lstrip()) == 3:
+            packages.append({"module": name.strip(), "cumulative_ms": round(int(cumulative_us) / 1000, 1)})
+    return sorted(packages, key=lambda row: row["cumulative_ms"], reverse=True)[:top]
+
+
+def time_to_first_response(port: int):
+    start = time.perf_counter()
+    process, _ = start_server(port)
+    elapsed = time.perf_counter() - start
+    process.terminate()
+    process.wait()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters timed per measurement")
+    parser.add_argument("--top", type=int, default=10, help="heaviest imports of main listed")
+    parser.add_argument("--skip-server", action="store_true", help="only time the import, no database needed")
+    parser.add_argument("--port", type=int, default=8103)
+    args = parser.parse_args()
+
+    probes = [probe_import() for _ in range(args.repeat)]
+    import_times = [probe["seconds"] * 1000 for probe in probes]
+    rows = [{
+        "measurement": "import main",
+        "median_ms": round(statistics.median(import_times), 1),
+        "min_ms": round(min(import_times), 1),
+        "max_ms": round(max(import_times), 1)
+    }]
+
+    if not args.skip_server:
+        server_times = [time_to_first_response(args.port) * 1000 for _ in range(args.repeat)]
+        rows.append({
+            "measurement": "uvicorn to first /health",
+            "median_ms": round(statistics.median(server_times), 1),
+            "min_ms": round(min(server_times), 1),
+            "max_ms": round(max(server_times), 1)
+        })
+
+    print_table(rows, ["measurement", "median_ms", "min_ms", "max_ms"])
+    print(f"\nHeavy modules loaded by the import: {', '.join(probes[0]['loaded']) or 'none'}")
+    print("\nHeaviest imports of main:")
+    print_table(import_profile(args.top), ["module", "cumulative_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,20 @@
 # main.py for Sales Notes Service with CloudWatch metrics middleware
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import os
 import logging
 
-from app.database import engine
-from app.models.sales_note import SalesNote, SalesNoteItem
+from app.database import get_engine, get_async_engine, dispose_async_engine, validate_pool_capacity, register_pool_metrics, replica_router, DB_ASYNC_MODE
 from app.views import sales_note as sales_note_views
 from app.middleware.metrics import CloudWatchMetricsMiddleware
+from app.middleware.profiling import RequestProfilingMiddleware, instrument_engine
+from app.middleware.read_your_writes import ReadYourWritesMiddleware
+from app.utils.pdf_jobs import PDFJobQueue
+from app.utils.metrics_aggregator import metrics_aggregator
+from app.utils.lookup_cache import register_lookup_cache_metrics
+from app.utils.idempotency import idempotency_key_sweeper
+from app.config import PDF_JOBS_ENABLED, PDF_STORAGE_PATH, REQUEST_INSTRUMENTATION
 
 # Configure logging
 logging.basicConfig(
@@ -16,19 +23,45 @@ logging.basicConfig(
 )
 logger = logging.getLogger("sales_notes_service")
 
-# Create database tables
-SalesNote.__table__.create(bind=engine, checkfirst=True)
-SalesNoteItem.__table__.create(bind=engine, checkfirst=True)
+# Tables are created by "python manage.py migrate", not on import
 
-# Create storage directory for PDFs
-pdf_dir = os.getenv("PDF_STORAGE_PATH", "/tmp/sales_notes_pdfs")
-os.makedirs(pdf_dir, exist_ok=True)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    validate_pool_capacity()
+    # Create storage directory for PDFs
+    os.makedirs(PDF_STORAGE_PATH, exist_ok=True)
 
-app = FastAPI(title="Sales Notes Service")
+    engine = get_engine()
+    async_engine = get_async_engine()
+    register_pool_metrics()
+    register_lookup_cache_metrics()
+    if REQUEST_INSTRUMENTATION:
+        instrument_engine(engine)
+        if async_engine is not None:
+            instrument_engine(async_engine.sync_engine)
+    metrics_aggregator.start()
+    replica_router.start()
+    idempotency_key_sweeper.start()
+    if PDF_JOBS_ENABLED:
+        PDFJobQueue.resume_pending()
+    yield
+    await idempotency_key_sweeper.stop()
+    await replica_router.stop()
+    PDFJobQueue.shutdown()
+    await metrics_aggregator.stop()
+    await dispose_async_engine()
+
+app = FastAPI(title="Sales Notes Service", lifespan=lifespan)
 
 # Add CloudWatch metrics middleware
 app.add_middleware(CloudWatchMetricsMiddleware)
 
+# Per-request SQL statistics and sampled profiling (no-op unless REQUEST_INSTRUMENTATION is set)
+app.add_middleware(RequestProfilingMiddleware)
+
+# Sends clients' reads to the primary for a while after they write (only with DB_REPLICA_URLS)
+app.add_middleware(ReadYourWritesMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -38,8 +71,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Include routers
-app.include_router(sales_note_views.router, prefix="/api/sales-notes", tags=["sales-notes"])
+# Include routers; in async mode the async CRUD handlers are matched first
+if DB_ASYNC_MODE:
+    from app.views import sales_note_async as sales_note_async_views
+    app.include_router(sales_note_async_views.router)
+app.include_router(sales_note_views.router)
 
 @app.get("/")
 async def root():
@@ -0,0 +1,151 @@
+# manage.py
+"""
+Maintenance commands for the Sales Notes Service.
+
+    python manage.py migrate
+    python manage.py render-pdfs --customer-id 42 --date-from 2024-01-01 --date-to 2024-02-01
+    python manage.py render-pdfs --ids 1 2 3 --merge statements.pdf
+    python manage.py rebuild-stats [--date-from 2024-01-01 --date-to 2024-02-01]
+    python manage.py archive-notes [--before 2023-01-01]
+    python manage.py create-partitions [--first-year 2020 --years-ahead 1]
+    python manage.py prune-changes [--days 7]
+"""
+import argparse
+import json
+from datetime import datetime, timedelta
+
+from app.config import PDF_WORKERS, ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, CHANGE_FEED_RETENTION_DAYS
+from app.database import SessionLocal
+
+
+def migrate(args):
+    from app.schema import create_schema
+
+    create_schema()
+    print("Schema is up to date")
+
+
+def render_pdfs(args):
+    from app.utils.pdf_batch import PDFBatchRenderer
+
+    if not (args.ids or args.customer_id or args.date_from or args.date_to):
+        raise SystemExit("Select the notes with --ids, --customer-id or --date-from/--date-to")
+
+    db = SessionLocal()
+    try:
+        report = PDFBatchRenderer.render(
+            db,
+            sales_note_ids=args.ids,
+            customer_id=args.customer_id,
+            date_from=args.date_from,
+            date_to=args.date_to,
+            merge=args.merge is not None,
+            output_path=args.merge,
+            workers=args.workers
+        )
+    finally:
+        db.close()
+
+    report.pop("files", None)
+    print(json.dumps(report, indent=2))
+
+
+def rebuild_stats(args):
+    from app.schema import create_schema
+    from app.utils.sales_stats import SalesNoteRollup
+
+    # The rollup is rebuilt from the archive too
+    create_schema()
+    db = SessionLocal()
+    try:
+        rows = SalesNoteRollup.rebuild(
+            db,
+            date_from=args.date_from.date() if args.date_from else None,
+            date_to=args.date_to.date() if args.date_to else None
+        )
+    finally:
+        db.close()
+    print(f"Rebuilt {rows} daily stat rows")
+
+
+def archive_notes(args):
+    from app.schema import create_schema
+    from app.utils.archive import SalesNoteArchiver
+
+    create_schema()
+    before = args.before or datetime.now() - timedelta(days=ARCHIVE_AFTER_DAYS)
+    db = SessionLocal()
+    try:
+        moved = SalesNoteArchiver.archive(db, before, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Archived {moved} sales notes dated before {before.isoformat()}")
+
+
+def create_partitions(args):
+    from app.schema import create_schema
+    from app.utils.archive import SalesNoteArchiver
+
+    create_schema()
+    last_year = datetime.now().year + args.years_ahead
+    db = SessionLocal()
+    try:
+        created = SalesNoteArchiver.ensure_partitions(db, args.first_year or datetime.now().year, last_year)
+    finally:
+        db.close()
+    print(f"Created {len(created)} partitions" + (f": {', '.join(created)}" if created else ""))
+
+
+def prune_changes(args):
+    from app.utils.change_feed import SalesNoteChangeFeed
+
+    db = SessionLocal()
+    try:
+        deleted = SalesNoteChangeFeed.prune(db, datetime.now().astimezone() - timedelta(days=args.days))
+    finally:
+        db.close()
+    print(f"Pruned {deleted} changes older than {args.days} days")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_command = commands.add_parser("migrate", help="create missing tables, indexes and foreign keys")
+    migrate_command.set_defaults(handler=migrate)
+
+    render = commands.add_parser("render-pdfs", help="render the PDFs of many sales notes")
+    render.add_argument("--ids", type=int, nargs="+", help="sales note ids")
+    render.add_argument("--customer-id", type=int)
+    render.add_argument("--date-from", type=datetime.fromisoformat, help="notes dated on or after (ISO date)")
+    render.add_argument("--date-to", type=datetime.fromisoformat, help="notes dated before (ISO date)")
+    render.add_argument("--merge", metavar="OUTPUT", help="write a single merged PDF to OUTPUT instead of one file per note")
+    render.add_argument("--workers", type=int, default=PDF_WORKERS, help="rendering processes (1 renders in process)")
+    render.set_defaults(handler=render_pdfs)
+
+    rebuild = commands.add_parser("rebuild-stats", help="recompute the daily stats rollup from the sales notes")
+    rebuild.add_argument("--date-from", type=datetime.fromisoformat, help="first day to rebuild (ISO date)")
+    rebuild.add_argument("--date-to", type=datetime.fromisoformat, help="day after the last one to rebuild (ISO date)")
+    rebuild.set_defaults(handler=rebuild_stats)
+
+    archive = commands.add_parser("archive-notes", help="move old paid and canceled notes to the archive partitions")
+    archive.add_argument("--before", type=datetime.fromisoformat,
+                         help=f"archive notes dated before (ISO date; default {ARCHIVE_AFTER_DAYS} days ago)")
+    archive.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="notes moved per transaction")
+    archive.set_defaults(handler=archive_notes)
+
+    partitions = commands.add_parser("create-partitions", help="create the yearly archive partitions ahead of time")
+    partitions.add_argument("--first-year", type=int, help="first year to create (default: the current year)")
+    partitions.add_argument("--years-ahead", type=int, default=1, help="years after the current one to create")
+    partitions.set_defaults(handler=create_partitions)
+
+    prune = commands.add_parser("prune-changes", help="delete old entries of the sales note change feed")
+    prune.add_argument("--days", type=int, default=CHANGE_FEED_RETENTION_DAYS, help="keep changes of the last DAYS days")
+    prune.set_defaults(handler=prune_changes)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()